@@ -0,0 +1,456 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import ssl
+import time
+import base64
+import ftplib
+import threading
+from urllib.parse import urlsplit, unquote
+import requests
+from route_pool import RoutePool, MeteredReader
+from transport import TransportAdapter, TransportError, source_options
+from resolver import default_resolver
+from socket_tuning import SocketTuning
+
+PROXY_SCHEMES = ("http", "https", "socks5", "socks5h")
+PROXY_FAILURES = (407, 502, 503, 504)
+DIGEST_ALGORITHMS = {"sha-256": "sha256", "sha-512": "sha512", "md5": "md5"}
+
+class BackendError(Exception):
+    pass
+
+class RangeError(BackendError):
+    pass
+
+class NotModified(BackendError):
+    pass
+
+class IterReader:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.leftover = b""
+
+    def readinto(self, view):
+        if not self.leftover:
+            self.leftover = next(self.chunks, b"")
+        n = min(len(view), len(self.leftover))
+        view[:n] = self.leftover[:n]
+        self.leftover = self.leftover[n:]
+        return n
+
+class Backend:
+    schemes = ()
+
+    def probe(self, url):
+        raise NotImplementedError
+
+    def open_range(self, url, start, end, headers=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+def make_proxy_pool(proxies):
+    urls = [p.strip() for p in proxies if p and p.strip()]
+    for url in urls:
+        scheme = urlsplit(url).scheme.lower()
+        if scheme not in PROXY_SCHEMES:
+            raise BackendError(f"unsupported proxy type: {url}")
+        if scheme.startswith("socks"):
+            try:
+                import socks
+            except ImportError:
+                raise BackendError("SOCKS proxies need PySocks (pip install requests[socks])")
+    return RoutePool(urls) if urls else None
+
+def make_source_pool(sources):
+    names = [s.strip() for s in sources if s and s.strip()]
+    for name in names:
+        try:
+            source_options(name)
+        except TransportError as e:
+            raise BackendError(str(e))
+    return RoutePool(names) if names else None
+
+def is_route_failure(error):
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code in PROXY_FAILURES
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+def origin_digest(headers):
+    fields = {}
+    for name in ("repr-digest", "digest"):
+        for item in headers.get(name, "").split(","):
+            algorithm, sep, value = item.strip().partition("=")
+            if sep:
+                fields.setdefault(algorithm.lower(), value.strip().strip(":"))
+    if headers.get("content-md5"):
+        fields.setdefault("md5", headers["content-md5"].strip())
+    for algorithm, name in DIGEST_ALGORITHMS.items():
+        if algorithm in fields:
+            try:
+                return name, base64.b64decode(fields[algorithm], validate=True).hex()
+            except ValueError:
+                continue
+    return None
+
+def release_response(r, fp):
+    if fp.isclosed() and not fp.will_close and not fp.length:
+        r.raw.release_conn()
+    else:
+        r.close()
+
+class HttpBackend(Backend):
+    schemes = ("http", "https")
+
+    def __init__(self, proxy=None, connections=10, chunk_size=65536, zero_copy=True, sources=None, resolver=default_resolver, peers=None, peer_token=None, tuning=None):
+        if isinstance(proxy, (list, tuple)):
+            proxy = make_proxy_pool(proxy)
+        if isinstance(sources, (list, tuple)):
+            sources = make_source_pool(sources)
+        self.proxy_pool = proxy if isinstance(proxy, RoutePool) else None
+        self.proxy = None if self.proxy_pool else proxy
+        self.source_pool = sources
+        self.resolver = resolver
+        self.peers = peers
+        self.peer_token = peer_token
+        self.tuning = SocketTuning(**tuning) if isinstance(tuning, dict) else tuning
+        self.peer_pool = None
+        self.validators = (None, None)
+        self.digest = None
+        self.chunk_size = chunk_size
+        self.zero_copy = zero_copy
+        self.connections = connections
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def session_for(self, proxy=None, source=None, pinned=None):
+        key = (proxy, source, pinned)
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = TransportAdapter(source, None if proxy else self.resolver, pinned, self.tuning, pool_connections=4, pool_maxsize=max(10, self.connections))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                if proxy:
+                    session.proxies = {"http": proxy, "https": proxy}
+                self.sessions[key] = session
+        return session
+
+    def route_pools(self, url=None):
+        pools = {"proxy": self.proxy_pool, "source": self.source_pool, "address": None}
+        if url and self.resolver and not (self.proxy or self.proxy_pool):
+            parts = urlsplit(url)
+            try:
+                pool = self.resolver.pool_for(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+            except OSError:
+                pool = None
+            if pool and len(pool) > 1:
+                pools["address"] = pool
+        return {name: pool for name, pool in pools.items() if pool}
+
+    def attempts(self, url=None, pin=True):
+        return max([len(pool) for name, pool in self.route_pools(url).items() if pin or name != "address"] + [1])
+
+    def acquire(self, url=None, tried=(), pin=True):
+        routes = {name: (pool, pool.acquire(tried)) for name, pool in self.route_pools(url).items() if pin or name != "address"}
+        keys = {name: route.key for name, (pool, route) in routes.items()}
+        pinned = (urlsplit(url).hostname.lower(), keys["address"]) if "address" in keys else None
+        return list(routes.values()), self.session_for(keys.get("proxy"), keys.get("source"), pinned)
+
+    def release(self, routes, nbytes=0, seconds=0.0, ok=True):
+        for pool, route in routes:
+            pool.release(route, nbytes, seconds, ok)
+
+    def probe(self, url):
+        if self.proxy_pool:
+            self.check_proxies(url)
+        attempts = self.attempts(url, pin=False)
+        tried = []
+        for attempt in range(attempts):
+            routes, session = self.acquire(url, tried, pin=False)
+            tried.extend(route for pool, route in routes)
+            try:
+                headers = self.probe_headers(session, url)
+            except Exception as e:
+                failed = is_route_failure(e)
+                self.release(routes, ok=not failed)
+                if failed:
+                    for pool, route in routes:
+                        pool.mark(route, False)
+                if not failed or attempt == attempts - 1:
+                    raise
+                continue
+            self.release(routes)
+            break
+        self.validators = (headers.get("etag"), headers.get("last-modified"))
+        self.digest = origin_digest(headers)
+        cl = headers.get("content-length")
+        size = int(cl) if cl and cl.isdigit() else 0
+        return size, headers.get("accept-ranges", "").lower() == "bytes"
+
+    def probe_headers(self, session, url):
+        try:
+            head = session.head(url, proxies=self.proxy, timeout=10, allow_redirects=True)
+            head.raise_for_status()
+            return head.headers
+        except (requests.ConnectTimeout, requests.exceptions.ProxyError):
+            raise
+        except Exception:
+            r = session.get(url, proxies=self.proxy, stream=True, timeout=10)
+            r.close()
+            r.raise_for_status()
+            return r.headers
+
+    def check_proxies(self, url):
+        def check(route):
+            try:
+                r = self.session_for(route.key).head(url, timeout=10, allow_redirects=True)
+                r.raise_for_status()
+                self.proxy_pool.mark(route, True)
+            except Exception as e:
+                self.proxy_pool.mark(route, not is_route_failure(e))
+        threads = [threading.Thread(target=check, args=(route,)) for route in self.proxy_pool.routes]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if not self.proxy_pool.healthy_routes():
+            raise BackendError("no working proxy in the pool")
+
+    def open_range(self, url, start, end, headers=None):
+        if not self.peers or headers:
+            return self.open_origin(url, start, end, headers)
+        with self.lock:
+            if self.peer_pool is None:
+                self.peer_pool = RoutePool([None] + list(self.peers))
+        tried = []
+        while True:
+            route = self.peer_pool.acquire(tried)
+            tried.append(route)
+            try:
+                reader, close = self.open_origin(url, start, end) if route.key is None else self.open_peer(route.key, start, end)
+            except Exception:
+                self.peer_pool.release(route, ok=route.key is None)
+                if route.key is None:
+                    raise
+                continue
+            metered = MeteredReader(reader)
+            def close_route(close=close, route=route):
+                close()
+                self.peer_pool.release(route, metered.bytes, metered.elapsed(), not metered.failed)
+            return metered, close_route
+
+    def open_peer(self, peer_url, start, end):
+        headers = {"Range": f"bytes={start}-{end}" if end is not None else f"bytes={start}-"}
+        if self.peer_token:
+            headers["Authorization"] = "Bearer " + self.peer_token
+        r = self.session_for().get(peer_url, headers=headers, stream=True, timeout=5, proxies={"http": None, "https": None})
+        if r.status_code != 206:
+            r.close()
+            raise BackendError(f"peer answered {r.status_code}")
+        return self.reader(r)
+
+    def open_origin(self, url, start, end, extra=None):
+        headers = dict(extra or {})
+        ranged = bool(start or end is not None)
+        if ranged:
+            headers["Range"] = f"bytes={start}-{end}" if end is not None else f"bytes={start}-"
+        attempts = self.attempts(url)
+        tried = []
+        for attempt in range(attempts):
+            routes, session = self.acquire(url, tried)
+            tried.extend(route for pool, route in routes)
+            try:
+                r = session.get(url, headers=headers, proxies=self.proxy, stream=True, timeout=10)
+                try:
+                    r.raise_for_status()
+                    if r.status_code == 304:
+                        raise NotModified("not modified")
+                    if ranged and r.status_code != 206:
+                        raise RangeError("server ignored the Range request")
+                except Exception:
+                    r.close()
+                    raise
+            except Exception as e:
+                failed = is_route_failure(e)
+                self.release(routes, ok=not failed)
+                if not failed or attempt == attempts - 1:
+                    raise
+                continue
+            break
+        reader, finish = self.reader(r)
+        metered = MeteredReader(reader)
+        metered.headers = r.headers
+        def close():
+            finish()
+            self.release(routes, metered.bytes, metered.elapsed(), not metered.failed)
+        return metered, close
+
+    def reader(self, r):
+        if self.zero_copy and r.headers.get("content-encoding", "identity") == "identity":
+            fp = getattr(r.raw, "_fp", None)
+            if hasattr(fp, "readinto"):
+                return fp, lambda: release_response(r, fp)
+        return IterReader(r.iter_content(self.chunk_size)), r.close
+
+    def close(self):
+        with self.lock:
+            sessions, self.sessions = self.sessions, {}
+        for session in sessions.values():
+            session.close()
+
+class FtpReader:
+    def __init__(self, sock, remaining):
+        self.sock = sock
+        self.remaining = remaining
+        self.eof = False
+
+    def readinto(self, view):
+        if self.remaining is not None:
+            if self.remaining <= 0:
+                return 0
+            view = view[:self.remaining]
+        n = self.sock.recv_into(view)
+        if not n and len(view):
+            self.eof = True
+        if self.remaining is not None:
+            self.remaining -= n
+        return n
+
+class FtpBackend(Backend):
+    schemes = ("ftp", "ftps")
+    idle_timeout = 60
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def key(self, url):
+        parts = urlsplit(url)
+        return (parts.scheme, parts.hostname, parts.port or 21, unquote(parts.username or "anonymous"), unquote(parts.password or "anonymous@"))
+
+    def connect(self, key):
+        scheme, host, port, user, password = key
+        ftp = ftplib.FTP_TLS(timeout=self.timeout) if scheme == "ftps" else ftplib.FTP(timeout=self.timeout)
+        ftp.connect(host, port)
+        ftp.login(user, password)
+        if scheme == "ftps":
+            ftp.prot_p()
+        ftp.voidcmd("TYPE I")
+        return ftp
+
+    def acquire(self, key):
+        while True:
+            with self.lock:
+                pool = self.idle.get(key)
+                if not pool:
+                    break
+                ftp, since = pool.pop()
+            if time.time() - since > self.idle_timeout:
+                self.discard(ftp)
+                continue
+            try:
+                ftp.voidcmd("NOOP")
+                return ftp
+            except Exception:
+                self.discard(ftp)
+        return self.connect(key)
+
+    def release(self, key, ftp):
+        now = time.time()
+        stale = []
+        with self.lock:
+            for pool in self.idle.values():
+                stale += [entry for entry in pool if now - entry[1] > self.idle_timeout]
+                pool[:] = [entry for entry in pool if now - entry[1] <= self.idle_timeout]
+            self.idle.setdefault(key, []).append((ftp, now))
+        for old, _ in stale:
+            self.discard(old)
+
+    def discard(self, ftp):
+        try:
+            ftp.close()
+        except Exception:
+            pass
+
+    def probe(self, url):
+        key = self.key(url)
+        ftp = self.acquire(key)
+        try:
+            try:
+                size = ftp.size(unquote(urlsplit(url).path)) or 0
+            except ftplib.error_perm:
+                size = 0
+            try:
+                ftp.sendcmd("REST 0")
+                ranges = True
+            except ftplib.error_perm:
+                ranges = False
+        except Exception:
+            self.discard(ftp)
+            raise
+        self.release(key, ftp)
+        return size, ranges
+
+    def open_range(self, url, start, end, headers=None):
+        key = self.key(url)
+        ftp = self.acquire(key)
+        try:
+            sock = ftp.transfercmd("RETR " + unquote(urlsplit(url).path), rest=start or None)
+        except Exception:
+            self.discard(ftp)
+            raise
+        reader = FtpReader(sock, end - start + 1 if end is not None else None)
+        def close():
+            try:
+                try:
+                    if reader.eof and isinstance(sock, ssl.SSLSocket):
+                        sock.unwrap()
+                finally:
+                    sock.close()
+                ftp.getresp()
+                self.release(key, ftp)
+            except ftplib.Error:
+                self.release(key, ftp)
+            except Exception:
+                self.discard(ftp)
+        return reader, close
+
+    def close(self):
+        with self.lock:
+            pools, self.idle = self.idle, {}
+        for pool in pools.values():
+            for ftp, _ in pool:
+                self.discard(ftp)
+
+def backend_for(url, **options):
+    scheme = urlsplit(url).scheme.lower()
+    if scheme in FtpBackend.schemes:
+        return FtpBackend()
+    if scheme in HttpBackend.schemes:
+        return HttpBackend(**options)
+    raise BackendError(f"unsupported protocol: {scheme or url}")
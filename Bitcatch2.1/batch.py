@@ -0,0 +1,332 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import re
+import hashlib
+import time
+import threading
+from collections import deque
+from html.parser import HTMLParser
+from datetime import datetime
+from urllib.parse import urljoin, urlsplit, unquote
+import requests
+from PySide6.QtCore import QThread, Signal
+from disk_writer import DiskWriter, WriterError, BufferPool
+from backends import backend_for
+
+LISTED = re.compile(r"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2})?|\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}(?::\d{2})?|\d{4}-[A-Za-z]{3}-\d{2} \d{2}:\d{2}(?::\d{2})?)\s+(\d+(?:\.\d+)?[KMGTP]?|-)")
+
+class LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+        self.texts = []
+        self.in_link = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self.in_link = True
+            for name, value in attrs:
+                if name == "href" and value:
+                    self.links.append(value)
+                    self.texts.append("")
+
+    def handle_endtag(self, tag):
+        if tag == "a":
+            self.in_link = False
+
+    def handle_data(self, data):
+        if self.texts and not self.in_link:
+            self.texts[-1] += data
+
+def read_url_list(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+def parse_listing(base_url, html):
+    parser = LinkParser()
+    parser.feed(html)
+    dirs, files = [], {}
+    for href, text in zip(parser.links, parser.texts):
+        if href.startswith(("?", "#", "mailto:")):
+            continue
+        url = urljoin(base_url, href).split("#")[0].split("?")[0]
+        if not url.startswith(base_url) or url == base_url:
+            continue
+        if url.endswith("/"):
+            dirs.append(url)
+        elif url not in files:
+            m = LISTED.search(text)
+            files[url] = f"{m.group(1)}|{m.group(2)}" if m else None
+    return dirs, files
+
+def parse_index(base_url, html):
+    dirs, files = parse_listing(base_url, html)
+    return dirs, list(files)
+
+def crawl_index(root_url, session=None, max_depth=32, cancelled=lambda: False):
+    session = session or requests.Session()
+    if not root_url.endswith("/"):
+        root_url += "/"
+    seen = {root_url}
+    pending = deque([(root_url, 0)])
+    files = []
+    while pending and not cancelled():
+        url, depth = pending.popleft()
+        r = session.get(url, timeout=10)
+        r.raise_for_status()
+        dirs, found = parse_index(url, r.text)
+        files.extend(f for f in found if f not in seen)
+        seen.update(found)
+        if depth < max_depth:
+            for d in dirs:
+                if d not in seen:
+                    seen.add(d)
+                    pending.append((d, depth + 1))
+    return files
+
+def local_path(url, output_folder, root_url=None):
+    if root_url and url.startswith(root_url):
+        rel = unquote(url[len(root_url):])
+    else:
+        parts = urlsplit(url)
+        rel = parts.netloc.replace(":", "_") + "/" + unquote(parts.path)
+        if not parts.path or parts.path.endswith("/"):
+            rel += "/index.html"
+        if parts.query:
+            stem, ext = os.path.splitext(rel)
+            rel = f"{stem}-{hashlib.sha1(parts.query.encode()).hexdigest()[:8]}{ext}"
+    return relative_path(rel, output_folder)
+
+def relative_path(rel, output_folder):
+    parts = [p for p in rel.split("/") if p not in ("", ".", "..")]
+    return os.path.join(output_folder, *parts)
+
+class HostQueue:
+    def __init__(self):
+        self.urls = deque()
+        self.active = 0
+        self.backend = None
+        self.lock = threading.Lock()
+
+class BatchThread(QThread):
+    history_mode = "Batch"
+    progress_signal = Signal(int)
+    speed_signal = Signal(float)
+    files_signal = Signal(int, int)
+    history_signal = Signal(list)
+    error_signal = Signal(str)
+    def __init__(self, source, output_folder, hpd_mode=False, max_workers=None, per_host=None, history_batch=500, proxy=None, sources=None):
+        super().__init__()
+        self.source = source
+        self.output_folder = output_folder
+        self.hpd_mode = hpd_mode
+        self.proxy = proxy
+        self.sources = sources
+        self.chunk_size = 524288 if hpd_mode else 65536
+        self.max_workers = max_workers or (32 if hpd_mode else 8)
+        self.per_host = per_host or (8 if hpd_mode else 4)
+        self.history_batch = history_batch
+        self.pause = False
+        self.cancel = False
+        self.lock = threading.Lock()
+        self.ready = threading.Condition()
+        self.hosts = deque()
+        self.done = 0
+        self.failed = 0
+        self.first_error = None
+        self.total = 0
+        self.received = 0
+        self.pending_history = []
+        self.last_emit = 0
+    def run(self):
+        root_url = None
+        try:
+            if os.path.isfile(self.source):
+                urls = read_url_list(self.source)
+            else:
+                root_url = self.source if self.source.endswith("/") else self.source + "/"
+                urls = crawl_index(root_url, cancelled=lambda: self.cancel)
+        except Exception as e:
+            self.error_signal.emit("Batch source error: " + str(e))
+            return
+        self.transfer(urls, root_url)
+    def transfer(self, urls, root_url):
+        urls = list(dict.fromkeys(urls))
+        self.total = len(urls)
+        self.files_signal.emit(0, self.total)
+        hosts = {}
+        for url in urls:
+            key = urlsplit(url)[:2]
+            if key not in hosts:
+                hosts[key] = HostQueue()
+            hosts[key].urls.append(url)
+        self.hosts = deque(hosts.values())
+        self.start_time = time.time()
+        budget = 256 * 1024 * 1024 if self.hpd_mode else 64 * 1024 * 1024
+        self.writer = DiskWriter(budget=budget)
+        self.buffers = BufferPool(self.chunk_size, budget // self.chunk_size)
+        threads = []
+        try:
+            for _ in range(min(self.max_workers, len(urls))):
+                t = threading.Thread(target=self.worker, args=(root_url,))
+                threads.append(t)
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            self.writer.shutdown()
+            for host in hosts.values():
+                if host.backend is not None:
+                    host.backend.close()
+        self.flush_history()
+        self.emit_overall(force=True)
+        if self.failed:
+            self.error_signal.emit(f"{self.failed} of {self.total} files failed. First error: {self.first_error}")
+    def next_url(self):
+        with self.ready:
+            while not self.cancel:
+                for _ in range(len(self.hosts)):
+                    host = self.hosts[0]
+                    self.hosts.rotate(-1)
+                    if host.urls and host.active < self.per_host:
+                        host.active += 1
+                        return host, host.urls.popleft()
+                if not any(h.urls for h in self.hosts):
+                    return None, None
+                self.ready.wait(0.5)
+            return None, None
+    def worker(self, root_url):
+        while True:
+            host, url = self.next_url()
+            if url is None:
+                return
+            try:
+                self.fetch(host, url, local_path(url, self.output_folder, root_url))
+                ok = not self.cancel
+            except Exception as e:
+                ok = False
+                with self.lock:
+                    self.failed += 1
+                    if self.first_error is None:
+                        self.first_error = f"{url}: {e}"
+            with self.ready:
+                host.active -= 1
+                self.ready.notify_all()
+            self.finish(url, ok)
+    def backend(self, host, url):
+        with host.lock:
+            if host.backend is None:
+                host.backend = backend_for(url, proxy=self.proxy, sources=self.sources, connections=self.per_host, chunk_size=self.chunk_size)
+            return host.backend
+    def fetch(self, host, url, path):
+        reader, close = self.backend(host, url).open_range(url, 0, None)
+        temp = self.save(reader, close, path)
+        if temp:
+            os.replace(temp, path)
+    def save(self, reader, close, path):
+        temp = path + ".bcpart"
+        try:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd = self.writer.open(temp)
+                try:
+                    received = self.receive(reader, fd)
+                finally:
+                    self.writer.close(fd)
+                headers = getattr(reader, "headers", {})
+                length = headers.get("content-length", "")
+                if not self.cancel and length.isdigit() and "content-encoding" not in headers and received != int(length):
+                    raise OSError(f"connection closed after {received} of {length} bytes")
+            finally:
+                close()
+        except Exception as e:
+            if os.path.exists(temp):
+                os.remove(temp)
+            if isinstance(e, WriterError):
+                raise OSError(str(e))
+            raise
+        if self.cancel:
+            os.remove(temp)
+            return None
+        return temp
+    def receive(self, reader, fd):
+        offset = 0
+        while not self.cancel:
+            while self.pause:
+                time.sleep(0.1)
+            buf = self.buffers.acquire()
+            view = memoryview(buf)
+            filled = 0
+            try:
+                while filled < len(buf):
+                    n = reader.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+            except Exception:
+                self.buffers.release(buf)
+                raise
+            if not filled:
+                self.buffers.release(buf)
+                break
+            self.writer.write(fd, offset, view[:filled], release=lambda b=buf: self.buffers.release(b))
+            offset += filled
+            with self.lock:
+                self.received += filled
+            if filled < len(buf):
+                break
+        return offset
+    def finish(self, url, ok):
+        with self.lock:
+            self.done += 1
+            if ok:
+                self.pending_history.append({
+                    "url": url,
+                    "output_folder": self.output_folder,
+                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "mode": self.history_mode,
+                    "performance": "HPD (High Performance)" if self.hpd_mode else "Normal",
+                    "parts": 1
+                })
+            flush = len(self.pending_history) >= self.history_batch
+        if flush:
+            self.flush_history()
+        self.emit_overall()
+    def flush_history(self):
+        with self.lock:
+            entries, self.pending_history = self.pending_history, []
+        if entries:
+            self.history_signal.emit(entries)
+    def emit_overall(self, force=False):
+        now = time.time()
+        with self.lock:
+            if not force and now - self.last_emit < 0.2:
+                return
+            self.last_emit = now
+            done, received = self.done, self.received
+        elapsed = max(now - self.start_time, 1)
+        self.progress_signal.emit(int(done / self.total * 100) if self.total else 0)
+        self.speed_signal.emit(received / (1024 * 1024) / elapsed)
+        self.files_signal.emit(done, self.total)
@@ -0,0 +1,351 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import sys
+import time
+import socket
+import struct
+import argparse
+import tempfile
+import subprocess
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class PayloadHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_payload(False)
+
+    def do_GET(self):
+        self.send_payload(True)
+
+    def send_payload(self, body):
+        payload = self.server.payload
+        start, end = 0, len(payload) - 1
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            first, _, last = rng[6:].partition("-")
+            start = int(first) if first else 0
+            end = min(int(last), end) if last else end
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if body:
+            view = memoryview(payload)
+            step = 1024 * 1024
+            for pos in range(start, end + 1, step):
+                self.wfile.write(view[pos:min(pos + step, end + 1)])
+
+def start_server(payload, handler=PayloadHandler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.payload = payload
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# The delay is added in user space: the kernel still measures loopback RTT on
+# both legs, so receive-buffer autotuning never grows the way it would on a
+# real long path. Its throughput says nothing about the tuning; it only checks
+# that tuned sockets connect and complete. Only the netem run measures the gain.
+class LatencyLink:
+    def __init__(self, upstream, rtt):
+        self.upstream = upstream
+        self.rtt = rtt
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.relay, args=(client,), daemon=True).start()
+
+    def window(self, sock):
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 256)
+        if len(info) < 232:
+            raise SystemExit("the latency benchmark needs tcpi_snd_wnd in TCP_INFO (Linux 5.4+)")
+        return struct.unpack_from("I", info, 228)[0]
+
+    def relay(self, client):
+        time.sleep(self.rtt)
+        upstream = socket.create_connection(self.upstream)
+        def requests():
+            while True:
+                data = client.recv(65536)
+                if not data:
+                    break
+                time.sleep(self.rtt / 2)
+                upstream.sendall(data)
+            upstream.shutdown(socket.SHUT_WR)
+        threading.Thread(target=requests, daemon=True).start()
+        in_flight = []
+        unacked = 0
+        try:
+            while True:
+                now = time.monotonic()
+                while in_flight and in_flight[0][0] <= now:
+                    unacked -= in_flight.pop(0)[1]
+                allowed = self.window(client) - unacked
+                if allowed <= 0:
+                    time.sleep(max(0.001, in_flight[0][0] - now) if in_flight else 0.001)
+                    continue
+                data = upstream.recv(min(allowed, 1024 * 1024))
+                if not data:
+                    break
+                client.sendall(data)
+                in_flight.append((time.monotonic() + self.rtt, len(data)))
+                unacked += len(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (client, upstream):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+
+    def close(self):
+        self.listener.close()
+
+def add_netem(rtt_ms):
+    result = subprocess.run(["tc", "qdisc", "add", "dev", "lo", "root", "netem", "delay", f"{rtt_ms / 2:g}ms", "limit", "100000"], capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit("netem on lo needs root and the sch_netem module: " + result.stderr.strip())
+
+def remove_netem():
+    subprocess.run(["tc", "qdisc", "del", "dev", "lo", "root"], capture_output=True)
+
+def bench_latency(rtt_ms, size_mb, parts, rate_mb, congestion, user_space=False):
+    from PySide6.QtCore import QCoreApplication
+    from download_thread import DownloadThread
+    from socket_tuning import SocketTuning
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    payload = os.urandom(1024 * 1024) * size_mb
+    server = start_server(payload)
+    if not user_space:
+        add_netem(rtt_ms)
+        link = None
+        url = f"http://127.0.0.1:{server.server_port}/payload.bin"
+        print(f"netem on lo: {rtt_ms} ms RTT, {parts} parts, {size_mb} MB")
+    else:
+        link = LatencyLink(("127.0.0.1", server.server_port), rtt_ms / 1000)
+        url = f"http://127.0.0.1:{link.port}/payload.bin"
+        print(f"user-space link: {rtt_ms} ms RTT, window = receiver's advertised window, {parts} parts, {size_mb} MB")
+        print("functional check only: the kernel sees loopback RTT, so these rates do not compare the tunings")
+    try:
+        run_latency(DownloadThread, SocketTuning, url, payload, size_mb, parts, rate_mb, rtt_ms, congestion)
+    finally:
+        if link:
+            link.close()
+        else:
+            remove_netem()
+        server.shutdown()
+
+def run_latency(DownloadThread, SocketTuning, url, payload, size_mb, parts, rate_mb, rtt_ms, congestion):
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("kernel defaults", "tuned"):
+            tuning = SocketTuning(congestion=congestion, rate=rate_mb * 1024 * 1024, rtt=rtt_ms / 1000, measure=False) if name == "tuned" else None
+            thread = DownloadThread(url, folder, parts, tuning=tuning)
+            wall = time.perf_counter()
+            thread.run()
+            wall = time.perf_counter() - wall
+            with open(os.path.join(folder, "payload.bin"), "rb") as f:
+                ok = f.read() == payload
+            print(f"{name:>16}: {size_mb / wall:8.1f} MB/s  {wall:6.2f} s  {'ok' if ok else 'CORRUPT'}")
+            if tuning:
+                for key, value in tuning.report().items():
+                    print(f"{'':>18}{key}: {value}")
+
+def iter_content_loop(url, path, chunk_size):
+    import requests
+    from disk_writer import DiskWriter
+    writer = DiskWriter()
+    fd = writer.open(path)
+    r = requests.get(url, stream=True, timeout=10)
+    offset = 0
+    for chunk in r.iter_content(chunk_size):
+        if chunk:
+            writer.write(fd, offset, chunk)
+            offset += len(chunk)
+    r.close()
+    writer.close(fd)
+    writer.shutdown()
+
+def readinto_loop(url, path, size):
+    from download_thread import DownloadThread
+    from disk_writer import DiskWriter, BufferPool
+    from backends import HttpBackend
+    thread = DownloadThread(url, os.path.dirname(path), 1, hpd_mode=True)
+    thread.backend = HttpBackend(chunk_size=thread.chunk_size())
+    thread.total_size = size
+    thread.start_time = time.time()
+    thread.writer = DiskWriter()
+    thread.buffers = BufferPool(thread.chunk_size(), 128)
+    reader, close = thread.open_range(0, None)
+    thread.receive(reader, close, path, 0)
+    thread.writer.shutdown()
+
+def bench_receive(size_mb, rounds):
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    server = start_server(os.urandom(1024 * 1024) * size_mb)
+    url = f"http://127.0.0.1:{server.server_port}/payload.bin"
+    results = {"iter_content": [], "readinto": []}
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "payload.bin")
+        for _ in range(rounds):
+            for name in results:
+                wall, cpu = time.perf_counter(), time.process_time()
+                if name == "readinto":
+                    readinto_loop(url, path, size_mb * 1024 * 1024)
+                else:
+                    iter_content_loop(url, path, 524288)
+                results[name].append((time.perf_counter() - wall, time.process_time() - cpu))
+                os.remove(path)
+    for name, runs in results.items():
+        wall, cpu = sorted(runs)[len(runs) // 2]
+        print(f"{name:>12}: {size_mb / wall:8.1f} MB/s  {cpu / size_mb * 1000:6.2f} ms CPU/MB  (median of {len(runs)})")
+    server.shutdown()
+
+STARTUP_PROBE = '''
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+from PySide6.QtCore import QObject, QEvent, QTimer
+from PySide6.QtWidgets import QApplication
+import main
+app = QApplication(sys.argv[:1])
+window, tray = main.create_window(app)
+class FirstPaint(QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not hasattr(self, "painted"):
+            self.painted = time.perf_counter() - started
+            QTimer.singleShot(0, self.done)
+        return False
+    def done(self):
+        try:
+            import resource
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        except ImportError:
+            rss = 0
+        print(json.dumps({"first_paint": self.painted, "rss_kb": rss}))
+        app.quit()
+probe = FirstPaint()
+window.installEventFilter(probe)
+window.show()
+window.history_loader.start()
+app.exec()
+window.history_loader.wait()
+'''
+
+def bench_startup(history_entries, rounds, max_ms):
+    import json
+    import subprocess
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY") and sys.platform.startswith("linux"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    entry = {"url": "https://example.com/file.iso", "output_folder": "/tmp", "time": "2025-01-01 00:00:00", "mode": "Multi-part Download", "performance": "Normal", "parts": 4}
+    worst = 0
+    with tempfile.TemporaryDirectory() as cwd:
+        with open(os.path.join(cwd, "history.json"), "w", encoding="utf-8") as f:
+            json.dump([entry] * history_entries, f)
+        for _ in range(rounds):
+            launched = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", STARTUP_PROBE, here], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+            wall = time.perf_counter() - launched
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            worst = max(worst, result["first_paint"] * 1000)
+            print(f"first paint: {result['first_paint'] * 1000:7.1f} ms after interpreter start, {wall * 1000:7.1f} ms whole run  RSS: {result['rss_kb'] / 1024:6.1f} MB")
+    if max_ms and worst > max_ms:
+        print(f"startup regression: {worst:.1f} ms > {max_ms} ms")
+        sys.exit(1)
+
+def bench_simulate(scenarios, policies, connections, seed, max_minutes, max_wasted_mb):
+    from simulation import SCENARIOS, POLICIES, MB, simulate
+    failed = []
+    for scenario in scenarios or SCENARIOS:
+        for policy in policies or POLICIES:
+            wall = time.perf_counter()
+            result = simulate(scenario, policy, connections, seed)
+            wall = time.perf_counter() - wall
+            print(f"{scenario:>15} {result.row()}  ({wall * 1000:.0f} ms)")
+            if max_minutes and (not result.completed or result.elapsed > max_minutes * 60):
+                failed.append(f"{scenario}/{policy}: {'failed' if not result.completed else f'{result.elapsed / 60:.1f} min'}")
+            if max_wasted_mb and result.wasted > max_wasted_mb * MB:
+                failed.append(f"{scenario}/{policy}: {result.wasted / MB:.1f} MB wasted")
+    for line in failed:
+        print(f"simulation regression: {line}")
+    if failed:
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description="BitCatch benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    receive = sub.add_parser("receive", help="iter_content loop vs readinto buffer pool")
+    receive.add_argument("--size", type=int, default=512, help="payload size in MB")
+    receive.add_argument("--rounds", type=int, default=3)
+    startup = sub.add_parser("startup", help="time to first paint and RSS of the GUI")
+    startup.add_argument("--history", type=int, default=50000, help="entries in the generated history.json")
+    startup.add_argument("--rounds", type=int, default=3)
+    startup.add_argument("--max-ms", type=float, default=0, help="exit with status 1 when slower than this")
+    latency = sub.add_parser("latency", help="kernel socket defaults vs BDP-sized buffers over a loopback delayed by tc netem (root)")
+    latency.add_argument("--rtt", type=float, default=100, help="round trip time in ms")
+    latency.add_argument("--size", type=int, default=64, help="payload size in MB")
+    latency.add_argument("--parts", type=int, default=4)
+    latency.add_argument("--rate", type=float, default=16, help="expected MB/s per connection used to size the buffers")
+    latency.add_argument("--congestion", help="TCP congestion control for the tuned run, e.g. bbr")
+    latency.add_argument("--user-space", action="store_true", help="without netem: relay through a user-space delay link; checks that tuned downloads complete, does not measure the gain")
+    simulate = sub.add_parser("simulate", help="scheduler policies against a scripted fake server on a virtual clock")
+    simulate.add_argument("scenarios", nargs="*", help="default: all scenarios")
+    simulate.add_argument("--policy", action="append", help="single, split, segments or stream (repeatable, default: all)")
+    simulate.add_argument("--connections", type=int, default=8)
+    simulate.add_argument("--seed", type=int, default=0)
+    simulate.add_argument("--max-minutes", type=float, default=0, help="exit with status 1 when a run fails or takes longer than this simulated time")
+    simulate.add_argument("--max-wasted-mb", type=float, default=0, help="exit with status 1 when a run wastes more than this")
+    args = parser.parse_args()
+    if args.command == "receive":
+        bench_receive(args.size, args.rounds)
+    elif args.command == "startup":
+        bench_startup(args.history, args.rounds, args.max_ms)
+    elif args.command == "latency":
+        bench_latency(args.rtt, args.size, args.parts, args.rate, args.congestion, args.user_space)
+    elif args.command == "simulate":
+        bench_simulate(args.scenarios, args.policy, args.connections, args.seed, args.max_minutes, args.max_wasted_mb)
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -0,0 +1,132 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import sys
+import argparse
+from PySide6.QtCore import QCoreApplication
+
+def report(message):
+    sys.stderr.write(message + "\n")
+    sys.stderr.flush()
+
+def stream(args):
+    from download_thread import DownloadThread
+    parts = args.parts or (os.cpu_count() if args.hpd else 4)
+    thread = DownloadThread(args.url, None, parts, args.hpd, stream_to=args.output)
+    thread.error_signal.connect(report)
+    thread.run()
+
+def batch(args):
+    from batch import BatchThread
+    thread = BatchThread(args.source, args.folder, args.hpd)
+    thread.error_signal.connect(report)
+    thread.run()
+    report(f"{thread.done - thread.failed}/{thread.total} files downloaded")
+
+def mirror(args):
+    from mirror import MirrorThread
+    thread = MirrorThread(args.url, args.folder, args.hpd, delete=args.delete)
+    thread.error_signal.connect(report)
+    thread.run()
+    fetched = thread.done - thread.failed - len(thread.not_modified)
+    report(f"{thread.listed} files listed: {fetched} downloaded, {thread.skipped + len(thread.not_modified)} unchanged, {thread.failed} failed, {thread.deleted} deleted")
+
+def delta(args):
+    from download_thread import DownloadThread
+    parts = args.parts or (os.cpu_count() if args.hpd else 4)
+    thread = DownloadThread(args.url, args.folder, parts, args.hpd, delta_control=args.control or args.url + ".zsync")
+    thread.error_signal.connect(report)
+    thread.run()
+
+def makedelta(args):
+    from delta import make_control
+    output = args.output or args.file + ".zsync"
+    with open(output, "wb") as f:
+        f.write(make_control(args.file, args.url, args.blocksize))
+    report(f"wrote {output}")
+
+def peer(args):
+    import time
+    from peer_cache import PeerCache, PeerService
+    token = args.token or os.environ.get("BITCATCH_PEER_TOKEN")
+    if not token:
+        report("peer: pass --token or set BITCATCH_PEER_TOKEN")
+        sys.exit(2)
+    cache = PeerCache(args.cache)
+    for url, path in args.share or ():
+        cache.add(url, path)
+    cache.save()
+    service = PeerService(cache, token, args.port, args.host, discovery=not args.no_discovery)
+    service.start()
+    report(f"serving {len(cache.entries)} files to LAN peers on {service.host}:{service.port}")
+    while True:
+        time.sleep(3600)
+
+def main():
+    parser = argparse.ArgumentParser(description="BitCatch command line")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("stream", help="download in parallel and write the file in order to stdout or a pipe")
+    p.add_argument("url")
+    p.add_argument("-o", "--output", default="-", help="'-' for stdout (default), a named pipe or a file path")
+    p.add_argument("--parts", type=int, default=0)
+    p.add_argument("--hpd", action="store_true", help="HPD (High Performance) mode")
+    p.set_defaults(func=stream)
+    p = sub.add_parser("batch", help="download every URL of a list file or a directory index")
+    p.add_argument("source", help="URL list file or directory index URL")
+    p.add_argument("folder")
+    p.add_argument("--hpd", action="store_true", help="HPD (High Performance) mode")
+    p.set_defaults(func=batch)
+    p = sub.add_parser("mirror", help="sync a local folder with a directory index, fetching only new or changed files")
+    p.add_argument("url", help="directory index URL")
+    p.add_argument("folder")
+    p.add_argument("--delete", action="store_true", help="remove local files that disappeared from the listing")
+    p.add_argument("--hpd", action="store_true", help="HPD (High Performance) mode")
+    p.set_defaults(func=mirror)
+    p = sub.add_parser("delta", help="update a previously downloaded file by fetching only changed blocks")
+    p.add_argument("url")
+    p.add_argument("folder", help="folder holding the old copy; it is replaced in place")
+    p.add_argument("--control", help="control file URL or path (default: URL + .zsync)")
+    p.add_argument("--parts", type=int, default=0)
+    p.add_argument("--hpd", action="store_true", help="HPD (High Performance) mode")
+    p.set_defaults(func=delta)
+    p = sub.add_parser("makedelta", help="write a block checksum control file to publish next to FILE")
+    p.add_argument("file")
+    p.add_argument("--url", help="URL recorded in the control file")
+    p.add_argument("--blocksize", type=int, default=65536)
+    p.add_argument("-o", "--output", help="default: FILE.zsync")
+    p.set_defaults(func=makedelta)
+    p = sub.add_parser("peer", help="serve completed downloads to other BitCatch instances on the LAN")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--cache", default="peer_cache.json", help="shared file index")
+    p.add_argument("--share", nargs=2, action="append", metavar=("URL", "FILE"), help="add FILE as a copy of URL (repeatable)")
+    p.add_argument("--token", help="shared secret peers must present (default: $BITCATCH_PEER_TOKEN)")
+    p.add_argument("--host", help="LAN address to serve on (default: the address of the default route)")
+    p.add_argument("--no-discovery", action="store_true", help="do not answer local discovery broadcasts")
+    p.set_defaults(func=peer)
+    args = parser.parse_args()
+    app = QCoreApplication(sys.argv[:1])
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
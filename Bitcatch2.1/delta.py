@@ -0,0 +1,220 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import mmap
+import hashlib
+from itertools import accumulate
+
+MERGE_GAP = 256 * 1024
+MAX_RANGE = 8 * 1024 * 1024
+SCAN_REPORT = 1024 * 1024
+# Blocks that still line up are hashed at roughly 30 MB/s, but rolling the weak
+# sum past inserted or changed bytes is a pure Python loop of about 2 MB/s.
+# A scan stops once misses pass this limit and outnumber matches; every block
+# not found by then is fetched from the origin instead.
+MISS_LIMIT = 16 * 1024 * 1024
+
+class DeltaError(Exception):
+    pass
+
+class Control:
+    def __init__(self, headers, blocks):
+        self.headers = headers
+        self.blocksize = int(headers["Blocksize"])
+        self.length = int(headers["Length"])
+        seq, rsum, checksum = (int(x) for x in headers.get("Hash-Lengths", "1,4,16").split(","))
+        self.seq_matches = seq
+        self.rsum_bytes = rsum
+        self.checksum_bytes = checksum
+        self.algorithm = headers.get("Checksum", "md4").lower()
+        self.url = headers.get("URL")
+        if "SHA-256" in headers:
+            self.digest = ("sha256", headers["SHA-256"].lower())
+        elif "SHA-1" in headers:
+            self.digest = ("sha1", headers["SHA-1"].lower())
+        else:
+            self.digest = None
+        self.blocks = blocks
+        self.rsum_mask = (1 << (8 * rsum)) - 1
+        if self.algorithm == "md4":
+            try:
+                hashlib.new("md4")
+            except ValueError:
+                raise DeltaError("zsync control files need MD4 in hashlib (OpenSSL legacy provider); publish a BitCatch control file instead")
+
+    def count(self):
+        return (self.length + self.blocksize - 1) // self.blocksize
+
+    def strong(self, data):
+        if len(data) < self.blocksize:
+            data = bytes(data) + bytes(self.blocksize - len(data))
+        if self.algorithm == "md4":
+            return hashlib.new("md4", data).digest()[:self.checksum_bytes]
+        return hashlib.blake2b(data, digest_size=16).digest()[:self.checksum_bytes]
+
+def rsum(data, blocksize):
+    if len(data) < blocksize:
+        data = bytes(data) + bytes(blocksize - len(data))
+    a = sum(data) & 0xFFFF
+    b = sum(accumulate(data)) & 0xFFFF
+    return a, b
+
+def parse_control(raw):
+    end = raw.find(b"\n\n")
+    if end < 0:
+        raise DeltaError("control file has no header terminator")
+    headers = {}
+    for line in raw[:end].decode("utf-8", "replace").splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            headers[key.strip()] = value.strip()
+    if "Blocksize" not in headers or "Length" not in headers:
+        raise DeltaError("control file is missing Blocksize or Length")
+    seq, rsum_bytes, checksum = (int(x) for x in headers.get("Hash-Lengths", "1,4,16").split(","))
+    size = rsum_bytes + checksum
+    body = raw[end + 2:]
+    length = int(headers["Length"])
+    blocksize = int(headers["Blocksize"])
+    count = (length + blocksize - 1) // blocksize
+    if len(body) < count * size:
+        raise DeltaError("control file is truncated")
+    blocks = []
+    for i in range(count):
+        entry = body[i * size:(i + 1) * size]
+        blocks.append((int.from_bytes(entry[:rsum_bytes], "big"), entry[rsum_bytes:]))
+    return Control(headers, blocks)
+
+def make_control(path, url=None, blocksize=65536):
+    length = os.path.getsize(path)
+    digest = hashlib.sha256()
+    body = bytearray()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(blocksize)
+            if not block:
+                break
+            digest.update(block)
+            a, b = rsum(block, blocksize)
+            body += ((a << 16) | b).to_bytes(4, "big")
+            if len(block) < blocksize:
+                block += bytes(blocksize - len(block))
+            body += hashlib.blake2b(block, digest_size=16).digest()
+    lines = ["bitcatch-delta: 1", f"Filename: {os.path.basename(path)}", f"Blocksize: {blocksize}", f"Length: {length}", "Hash-Lengths: 1,4,16", "Checksum: blake2b"]
+    if url:
+        lines.append(f"URL: {url}")
+    lines.append(f"SHA-256: {digest.hexdigest()}")
+    return ("\n".join(lines) + "\n\n").encode() + bytes(body)
+
+def scan(control, old_path, cancelled=lambda: False, progress=lambda pos, size: None):
+    found = {}
+    if not old_path or not os.path.exists(old_path) or os.path.getsize(old_path) == 0:
+        return found
+    L = control.blocksize
+    by_strong = {}
+    by_weak = {}
+    for i, (weak, strong) in enumerate(control.blocks):
+        by_strong.setdefault(strong, []).append(i)
+        by_weak.setdefault(weak, []).append(i)
+    def confirm(i, pos, view):
+        if control.seq_matches < 2 or i + 1 >= len(control.blocks):
+            return True
+        return control.strong(view[pos + L:pos + 2 * L]) == control.blocks[i + 1][1]
+    with open(old_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        size = len(view)
+        pos = 0
+        rolling = False
+        a = b = 0
+        rolled = matched = 0
+        report = SCAN_REPORT
+        while pos < size and len(found) < len(control.blocks):
+            if not rolling:
+                if pos >= report:
+                    progress(pos, size)
+                    report = pos + SCAN_REPORT
+                if cancelled():
+                    break
+                block = view[pos:pos + L]
+                indices = [i for i in by_strong.get(control.strong(block), ()) if confirm(i, pos, view)]
+                if indices:
+                    a, b = rsum(block, L)
+                    weak = ((a << 16) | b) & control.rsum_mask
+                    indices = [i for i in indices if control.blocks[i][0] == weak]
+                if indices:
+                    for i in indices:
+                        found.setdefault(i, pos)
+                    matched += L
+                    pos += L
+                    continue
+                if pos + L > size:
+                    break
+                a, b = rsum(block, L)
+                rolling = True
+            weak = ((a << 16) | b) & control.rsum_mask
+            candidates = by_weak.get(weak)
+            if candidates:
+                strong = control.strong(view[pos:pos + L])
+                indices = [i for i in candidates if control.blocks[i][1] == strong and confirm(i, pos, view)]
+                if indices:
+                    for i in indices:
+                        found.setdefault(i, pos)
+                    matched += L
+                    pos += L
+                    rolling = False
+                    continue
+            if pos + L >= size:
+                break
+            out, new = view[pos], view[pos + L]
+            a = (a - out + new) & 0xFFFF
+            b = (b - L * out + a) & 0xFFFF
+            pos += 1
+            rolled += 1
+            if not pos & 0xFFFFF:
+                progress(pos, size)
+                if cancelled() or rolled > MISS_LIMIT and rolled > matched:
+                    break
+    progress(size, size)
+    return found
+
+def missing_ranges(control, found):
+    L = control.blocksize
+    ranges = []
+    for i in range(control.count()):
+        if i in found:
+            continue
+        start, end = i * L, min((i + 1) * L, control.length) - 1
+        if ranges and start - ranges[-1][1] - 1 <= MERGE_GAP and end - ranges[-1][0] < MAX_RANGE:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return [tuple(r) for r in ranges]
+
+def verify(control, path):
+    if control.digest is None:
+        return True
+    name, expected = control.digest
+    h = hashlib.new(name)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest() == expected
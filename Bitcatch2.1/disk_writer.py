@@ -0,0 +1,279 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import threading
+from collections import deque
+
+IOV_MAX = 1024
+FADVISE_LAG = 8 * 1024 * 1024
+DROP_CACHE_SIZE = 1024 * 1024 * 1024
+SYNC_START = 2
+SYNC_WAIT = 1 | 2 | 4
+
+def _load_sync_file_range():
+    try:
+        import ctypes
+        func = ctypes.CDLL(None, use_errno=True).sync_file_range
+    except (ImportError, OSError, AttributeError):
+        return None
+    func.argtypes = (ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_uint)
+    func.restype = ctypes.c_int
+    return func
+
+_sync_file_range = _load_sync_file_range() if hasattr(os, "posix_fadvise") else None
+
+class WriterError(Exception):
+    pass
+
+class BufferPool:
+    def __init__(self, size, count):
+        self.size = size
+        self.count = count
+        self.created = 0
+        self.free = []
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while not self.free and self.created >= self.count:
+                self.cond.wait()
+            if self.free:
+                return self.free.pop()
+            self.created += 1
+        return bytearray(self.size)
+
+    def release(self, buf):
+        with self.cond:
+            self.free.append(buf)
+            self.cond.notify()
+
+class _FileState:
+    def __init__(self, fd):
+        self.fd = fd
+        self.run_start = 0
+        self.run_end = 0
+        self.pieces = []
+        self.written_end = 0
+        self.advised = 0
+
+class DiskWriter:
+    def __init__(self, budget=64 * 1024 * 1024, align=1024 * 1024, drop_cache=False, linger=0.5):
+        self.budget = budget
+        self.align = align
+        self.drop_cache = drop_cache and hasattr(os, "posix_fadvise")
+        self.linger = linger
+        self.queue = deque()
+        self.pending = 0
+        self.waiters = 0
+        self.error = None
+        self.closed = False
+        self.files = {}
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def open(self, path, size=0, truncate=True):
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        if truncate:
+            flags |= os.O_TRUNC
+        fd = os.open(path, flags, 0o666)
+        if size > 0:
+            try:
+                os.ftruncate(fd, size)
+            except OSError:
+                pass
+        with self.cond:
+            self.files[fd] = _FileState(fd)
+        return fd
+
+    def write(self, fd, offset, data, release=None):
+        size = len(data)
+        with self.cond:
+            self.waiters += 1
+            while self.error is None and self.pending > 0 and self.pending + size > self.budget:
+                self.cond.notify_all()
+                self.cond.wait()
+            self.waiters -= 1
+            if self.error is not None:
+                if release:
+                    release()
+                raise WriterError(str(self.error))
+            self.pending += size
+            self.queue.append(("write", fd, offset, data, release))
+            self.cond.notify_all()
+
+    def close(self, fd):
+        done = threading.Event()
+        with self.cond:
+            self.queue.append(("close", fd, done))
+            self.cond.notify_all()
+        done.wait()
+        if self.error is not None:
+            raise WriterError(str(self.error))
+
+    def shutdown(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        for fd in list(self.files):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.files.clear()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.queue and not self.closed:
+                    self.cond.wait(self.linger)
+                stopping = self.closed and not self.queue
+                if not self.queue:
+                    batch = None
+                else:
+                    batch = list(self.queue)
+                    self.queue.clear()
+            if batch is None:
+                self._flush_all()
+                if stopping:
+                    return
+                continue
+            for item in batch:
+                if item[0] == "write":
+                    self._add(*item[1:])
+                else:
+                    self._close(*item[1:])
+            with self.cond:
+                starving = self.waiters > 0
+            if starving:
+                self._flush_all()
+
+    def _add(self, fd, offset, data, release):
+        state = self.files.get(fd)
+        if state is None or self.error is not None:
+            self._release(len(data), release)
+            return
+        if state.pieces and offset != state.run_end:
+            self._flush(state, state.run_end)
+        if not state.pieces:
+            state.run_start = state.run_end = offset
+        state.pieces.append([memoryview(data).cast("B"), release])
+        state.run_end += len(data)
+        boundary = state.run_end - state.run_end % self.align
+        if boundary - state.run_start >= self.align:
+            self._flush(state, boundary)
+
+    def _close(self, fd, done):
+        state = self.files.pop(fd, None)
+        if state is not None:
+            self._flush(state, state.run_end)
+            try:
+                if self.drop_cache and self.error is None:
+                    os.fdatasync(fd)
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+            try:
+                os.close(fd)
+            except OSError as e:
+                self._fail(e)
+        done.set()
+
+    def _flush_all(self):
+        for state in list(self.files.values()):
+            if state.pieces:
+                self._flush(state, state.run_end)
+
+    def _flush(self, state, upto):
+        views = []
+        releases = []
+        length = 0
+        while state.pieces and state.run_start + length < upto:
+            view, release = state.pieces[0]
+            take = min(len(view), upto - state.run_start - length)
+            views.append(view[:take])
+            length += take
+            if take == len(view):
+                state.pieces.pop(0)
+                releases.append((take, release))
+            else:
+                state.pieces[0][0] = view[take:]
+                releases.append((take, None))
+        if not views:
+            return
+        offset = state.run_start
+        state.run_start += length
+        if self.error is None:
+            try:
+                self._write_views(state.fd, offset, views)
+                state.written_end = max(state.written_end, offset + length)
+                self._advise(state, offset, length)
+            except OSError as e:
+                self._fail(e)
+        for size, release in releases:
+            self._release(size, release)
+
+    def _write_views(self, fd, offset, views):
+        if hasattr(os, "pwritev"):
+            while views:
+                n = os.pwritev(fd, views[:IOV_MAX], offset)
+                offset += n
+                while views and n >= len(views[0]):
+                    n -= len(views[0])
+                    views.pop(0)
+                if n:
+                    views[0] = views[0][n:]
+        else:
+            os.lseek(fd, offset, os.SEEK_SET)
+            for view in views:
+                while view:
+                    n = os.write(fd, view)
+                    view = view[n:]
+
+    def _advise(self, state, offset, length):
+        if not self.drop_cache:
+            return
+        if _sync_file_range:
+            _sync_file_range(state.fd, offset, length, SYNC_START)
+        limit = state.written_end - FADVISE_LAG
+        if limit - state.advised >= FADVISE_LAG:
+            # DONTNEED skips dirty pages, so the lagged range must be on disk first
+            if not _sync_file_range or _sync_file_range(state.fd, state.advised, limit - state.advised, SYNC_WAIT) != 0:
+                os.fdatasync(state.fd)
+            os.posix_fadvise(state.fd, state.advised, limit - state.advised, os.POSIX_FADV_DONTNEED)
+            state.advised = limit
+
+    def _release(self, size, release):
+        if release:
+            release()
+        with self.cond:
+            self.pending -= size
+            self.cond.notify_all()
+
+    def _fail(self, error):
+        with self.cond:
+            if self.error is None:
+                self.error = error
+            self.cond.notify_all()
@@ -22,10 +22,18 @@ ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEAL
 
 
 import os
+import hmac
+import mmap
 import time
 import threading
-import requests
+from collections import deque
+from urllib.parse import urlsplit
 from PySide6.QtCore import QThread, Signal
+from disk_writer import DiskWriter, WriterError, BufferPool, DROP_CACHE_SIZE
+from streaming import Sink, SegmentStream, stream_sequential
+from backends import backend_for, RangeError
+from delta import parse_control, scan, missing_ranges, verify
+from scheduler import part_scheduler
 
 class DownloadThread(QThread):
     progress_signal = Signal(int)
@@ -34,7 +42,9 @@ class DownloadThread(QThread):
     size_signal = Signal(int)
     part_count_signal = Signal(int)
     error_signal = Signal(str)
-    def __init__(self, url, output_folder, num_parts=1, hpd_mode=False, iso_mode=False, proxy=None):
+    socket_signal = Signal(str)
+    scan_signal = Signal(int)
+    def __init__(self, url, output_folder, num_parts=1, hpd_mode=False, iso_mode=False, proxy=None, drop_cache=None, stream_to=None, sources=None, delta_control=None, profiles=None, chunk_size=None, processes=0, peers=None, peer_cache=None, tuning=None, peer_token=None):
         super().__init__()
         self.url = url
         self.output_folder = output_folder
@@ -42,31 +52,121 @@ class DownloadThread(QThread):
         self.hpd_mode = hpd_mode
         self.iso_mode = iso_mode
         self.proxy = proxy
+        self.drop_cache = drop_cache
+        self.stream_to = stream_to
+        self.sources = sources
+        self.delta_control = delta_control
+        self.profiles = profiles
+        self.chunk = chunk_size
+        self.processes = processes
+        self.peers = peers
+        self.peer_token = peer_token
+        self.peer_cache = peer_cache
+        self.tuning = tuning
+        self.peer_digest = None
+        self.peer_assisted = False
+        self.output_path = None
+        self.errors = 0
+        self.connections = 1
+        self.writer = None
+        self.buffers = None
+        self.zero_copy = True
+        self.backend = None
+        self.ranges = False
         self.progress = [0] * num_parts
         self.total_size = 0
         self.pause = False
         self.cancel = False
     def run(self):
         try:
-            head = requests.head(self.url, proxies=self.proxy, timeout=10)
-            head.raise_for_status()
-            cl = head.headers.get("content-length")
-            if cl and cl.isdigit():
-                self.total_size = int(cl)
+            self.backend = backend_for(self.url, proxy=self.proxy, sources=self.sources, connections=self.num_parts, chunk_size=self.chunk_size(), zero_copy=self.zero_copy, tuning=self.tuning)
+            self.total_size, self.ranges = self.backend.probe(self.url)
             self.size_signal.emit(self.total_size)
+            self.emit_socket()
         except Exception as e:
-            try:
-                r = requests.get(self.url, proxies=self.proxy, stream=True, timeout=10)
-                r.raise_for_status()
-                cl = r.headers.get("content-length")
-                if cl and cl.isdigit():
-                    self.total_size = int(cl)
-                self.size_signal.emit(self.total_size)
-            except Exception as e2:
-                self.error_signal.emit("Connection error: " + str(e2))
-                return
+            self.error_signal.emit("Connection error: " + str(e))
+            return
         self.start_time = time.time()
-        if self.num_parts < 2 or self.total_size <= 0:
+        budget = 256 * 1024 * 1024 if self.hpd_mode else 64 * 1024 * 1024
+        if self.drop_cache is None:
+            self.drop_cache = self.total_size >= DROP_CACHE_SIZE
+        self.writer = DiskWriter(budget=budget, drop_cache=self.drop_cache)
+        self.buffers = BufferPool(self.chunk_size(), budget // self.chunk_size())
+        try:
+            self.use_peers()
+            self.download()
+            if not self.check_peer_data():
+                self.errors += 1
+                self.backend.peers = None
+                self.progress = [0] * self.num_parts
+                self.download()
+            self.share()
+        finally:
+            self.writer.shutdown()
+            self.backend.close()
+        self.emit_socket()
+        self.record_profile()
+    def emit_socket(self):
+        if self.tuning is not None and self.tuning.connections:
+            self.socket_signal.emit(self.tuning.summary())
+    def use_peers(self):
+        # peer data can only be trusted against a digest the origin itself publishes
+        if not self.peers or self.stream_to is not None or self.total_size <= 0 or not self.ranges or getattr(self.backend, "digest", None) is None:
+            return
+        from peer_cache import peer_list, find_peers
+        etag, modified = self.backend.validators
+        self.backend.peer_token = self.peer_token
+        self.backend.peers = find_peers(peer_list(self.peers), self.url, self.total_size, self.backend.digest, etag, modified, self.peer_token)
+        self.peer_assisted = bool(self.backend.peers)
+    def completed_file(self):
+        path = self.output_path
+        return not self.cancel and path and os.path.exists(path) and (self.total_size <= 0 or os.path.getsize(path) == self.total_size)
+    def check_peer_data(self):
+        if not getattr(self.backend, "peers", None) or self.cancel:
+            return True
+        if self.completed_file():
+            from peer_cache import file_digest
+            algorithm, expected = self.backend.digest
+            digest = file_digest(self.output_path, lambda: self.cancel, algorithm)
+            if self.cancel:
+                return True
+            if hmac.compare_digest(digest, expected):
+                self.peer_digest = digest if algorithm == "sha256" else None
+                return True
+            os.remove(self.output_path)
+        return False
+    def share(self):
+        if self.peer_cache is None or not self.completed_file():
+            return
+        etag, modified = getattr(self.backend, "validators", (None, None))
+        try:
+            self.peer_cache.add(self.url, self.output_path, etag, modified, self.peer_digest)
+            self.peer_cache.save()
+        except OSError:
+            pass
+    def record_profile(self):
+        # delta runs reuse local blocks and peer runs read from the LAN, neither measures the origin
+        if self.profiles is None or self.cancel or self.delta_control or self.peer_assisted:
+            return
+        downloaded = sum(self.progress)
+        if downloaded < 4 * 1024 * 1024:
+            return
+        rate = downloaded / (1024 * 1024) / max(time.time() - self.start_time, 0.001)
+        ranges = self.ranges or (self.connections > 1 and self.errors == 0)
+        rtt = self.tuning.rtt if self.tuning is not None else None
+        self.profiles.record(urlsplit(self.url).netloc, self.connections, self.chunk_size(), rate, ranges, self.errors, rtt)
+        try:
+            self.profiles.save()
+        except OSError:
+            pass
+    def download(self):
+        if self.stream_to is not None:
+            self.download_stream()
+        elif self.delta_control:
+            self.download_delta()
+        elif self.processes > 1 and self.num_parts > 1 and self.ranges and self.total_size > 0:
+            self.download_processes()
+        elif self.num_parts < 2 or self.total_size <= 0:
             self.download_single()
             if self.iso_mode and self.total_size > 0 and not self.cancel:
                 filename = os.path.join(self.output_folder, self.url.split("/")[-1])
@@ -78,68 +178,278 @@ class DownloadThread(QThread):
                     self.error_signal.emit("ISO verification error: " + str(e))
         else:
             self.download_multi()
+    def download_stream(self):
+        try:
+            sink = Sink(self.stream_to)
+        except OSError as e:
+            self.error_signal.emit("Stream error: " + str(e))
+            return
+        cancelled = lambda: self.cancel
+        paused = lambda: self.pause
+        try:
+            if self.num_parts < 2 or self.total_size <= 0 or not self.ranges:
+                self.stream_whole(sink, cancelled, paused)
+            else:
+                self.connections = self.num_parts
+                self.part_count_signal.emit(self.num_parts)
+                segment_size = 8 * 1024 * 1024 if self.hpd_mode else 4 * 1024 * 1024
+                stream = SegmentStream(self.open_range, self.total_size, sink.write, self.num_parts, segment_size, progress=self.progress, on_progress=self.emit_overall, cancelled=cancelled, paused=paused)
+                try:
+                    stream.run()
+                except RangeError:
+                    if stream.cursor:
+                        raise
+                    self.progress[:] = [0] * len(self.progress)
+                    self.connections = 1
+                    self.stream_whole(sink, cancelled, paused)
+        except Exception as e:
+            self.error_signal.emit("Stream error: " + str(e))
+        finally:
+            try:
+                sink.close()
+            except OSError:
+                pass
+    def stream_whole(self, sink, cancelled, paused):
+        reader, close = self.open_range(0, None)
+        try:
+            stream_sequential(reader, sink.write, self.progress, self.emit_overall, cancelled, paused, self.chunk_size())
+        finally:
+            close()
+    def download_delta(self):
+        filename = os.path.join(self.output_folder, self.url.split("/")[-1])
+        self.output_path = filename
+        temp = filename + ".bcdelta"
+        try:
+            control = self.load_control()
+            if self.total_size > 0 and control.length != self.total_size:
+                raise ValueError("control file does not match the remote file size")
+        except Exception as e:
+            self.error_signal.emit("Delta error: " + str(e))
+            return
+        self.total_size = control.length
+        self.size_signal.emit(self.total_size)
+        self.progress = [0] * (self.num_parts + 1)
+        found = scan(control, filename, lambda: self.cancel, lambda pos, size: self.scan_signal.emit(pos * 100 // size))
+        ranges = deque(missing_ranges(control, found))
+        self.part_count_signal.emit(len(ranges))
+        self.connections = max(1, min(self.num_parts, len(ranges)))
+        errors = []
+        try:
+            fd = self.writer.open(temp, size=control.length)
+        except OSError as e:
+            self.error_signal.emit("Write error: " + str(e))
+            return
+        try:
+            if found:
+                with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as old:
+                    for i, pos in found.items():
+                        if self.cancel:
+                            break
+                        length = min(control.blocksize, control.length - i * control.blocksize)
+                        self.writer.write(fd, i * control.blocksize, old[pos:pos + length])
+                        self.progress[self.num_parts] += length
+                self.emit_overall()
+            def fetch(idx):
+                while not self.cancel and not errors:
+                    try:
+                        start, end = ranges.popleft()
+                    except IndexError:
+                        return
+                    try:
+                        reader, close = self.open_range(start, end)
+                        try:
+                            self.receive_into(reader, fd, idx, start)
+                        finally:
+                            close()
+                    except Exception as e:
+                        self.errors += 1
+                        errors.append(e)
+            threads = [threading.Thread(target=fetch, args=(i,)) for i in range(min(self.num_parts, len(ranges)))]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                self.writer.close(fd)
+            except WriterError as e:
+                errors.append(e)
+        if errors or self.cancel:
+            if errors:
+                self.error_signal.emit("Delta error: " + str(errors[0]))
+            os.remove(temp)
+            return
+        if not verify(control, temp):
+            os.remove(temp)
+            self.error_signal.emit("Delta error: digest mismatch after assembly")
+            return
+        os.replace(temp, filename)
+    def download_processes(self):
+        from process_engine import ProcessEngine
+        filename = os.path.join(self.output_folder, self.url.split("/")[-1])
+        self.output_path = filename
+        try:
+            self.writer.close(self.writer.open(filename, size=self.total_size))
+        except (OSError, WriterError) as e:
+            self.error_signal.emit("Write error: " + str(e))
+            return
+        options = {"proxy": self.proxy, "sources": self.sources, "chunk_size": self.chunk_size(), "zero_copy": self.zero_copy, "peers": getattr(self.backend, "peers", None), "peer_token": self.peer_token, "tuning": self.tuning.settings() if self.tuning is not None else None}
+        segment_size = 32 * 1024 * 1024 if self.hpd_mode else 8 * 1024 * 1024
+        engine = ProcessEngine(self.url, filename, self.total_size, self.processes, self.num_parts, options, segment_size, drop_cache=self.drop_cache)
+        self.connections = self.num_parts
+        self.progress = engine.counters
+        self.part_count_signal.emit(self.num_parts)
+        engine.start()
+        while not engine.wait(0.25):
+            engine.set_state(self.cancel, self.pause)
+            self.emit_overall()
+        self.emit_overall()
+        messages = engine.messages()
+        self.errors += len(messages)
+        if engine.failed() or self.cancel or sum(self.progress) != self.total_size:
+            if os.path.exists(filename):
+                os.remove(filename)
+            if not self.cancel:
+                self.error_signal.emit("Download error: " + (messages[-1] if messages else "incomplete download"))
+    def load_control(self):
+        if os.path.isfile(self.delta_control):
+            with open(self.delta_control, "rb") as f:
+                return parse_control(f.read())
+        backend = backend_for(self.delta_control, proxy=self.proxy)
+        reader, close = backend.open_range(self.delta_control, 0, None)
+        raw = bytearray()
+        buf = bytearray(65536)
+        try:
+            while True:
+                n = reader.readinto(buf)
+                if not n:
+                    break
+                raw += buf[:n]
+        finally:
+            close()
+            backend.close()
+        return parse_control(bytes(raw))
+    def open_range(self, start, end):
+        return self.backend.open_range(self.url, start, end)
     def download_single(self):
         try:
-            r = requests.get(self.url, proxies=self.proxy, stream=True, timeout=10)
-            r.raise_for_status()
+            reader, close = self.open_range(0, None)
         except Exception as e:
+            self.errors += 1
             self.error_signal.emit("Download error: " + str(e))
             return
         filename = os.path.join(self.output_folder, self.url.split("/")[-1])
-        with open(filename, "wb") as f:
-            downloaded = 0
-            chunk_size = 524288 if self.hpd_mode else 65536
-            for chunk in r.iter_content(chunk_size):
-                if self.cancel:
-                    break
-                while self.pause:
-                    time.sleep(0.1)
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    self.progress[0] = downloaded
-                    self.emit_overall()
+        self.output_path = filename
+        self.receive(reader, close, filename, 0)
     def download_multi(self):
         base_filename = os.path.join(self.output_folder, self.url.split("/")[-1].split(".")[0])
-        part_size = self.total_size // self.num_parts if self.total_size > 0 else 0
+        scheduler = part_scheduler(self.total_size, self.num_parts)
+        self.connections = self.num_parts
         self.part_count_signal.emit(self.num_parts)
+        ignored = []
         threads = []
         for i in range(self.num_parts):
-            start = part_size * i
-            end = (start + part_size - 1) if i < (self.num_parts - 1) else None
-            t = threading.Thread(target=self.part_worker, args=(i, start, end, base_filename))
+            t = threading.Thread(target=self.part_worker, args=(i, scheduler, base_filename, ignored))
             threads.append(t)
             t.start()
         for t in threads:
             t.join()
-        if not self.cancel:
-            self.merge_parts(base_filename)
-    def part_worker(self, idx, start, end, base_filename):
-        headers = {}
-        if end is not None:
-            headers["Range"] = f"bytes={start}-{end}"
+        if self.cancel or not scheduler.complete():
+            self.remove_parts(base_filename)
+            if ignored and not self.cancel:
+                self.progress[:] = [0] * len(self.progress)
+                self.ranges = False
+                self.connections = 1
+                self.part_count_signal.emit(1)
+                self.download_single()
+            return
+        self.merge_parts(base_filename)
+    def part_worker(self, idx, scheduler, base_filename, ignored):
+        while not self.cancel:
+            seg = scheduler.claim()
+            if seg is None:
+                return
+            try:
+                reader, close = self.open_range(seg.start, seg.end if seg.end < self.total_size - 1 else None)
+            except RangeError as e:
+                scheduler.failed(seg)
+                ignored.append(e)
+                return
+            except Exception as e:
+                scheduler.failed(seg)
+                self.errors += 1
+                self.error_signal.emit("Part error: " + str(e))
+                return
+            part_path = f"{base_filename}.part{seg.start // scheduler.segment_size}"
+            received = self.receive(reader, close, part_path, idx)
+            if received == seg.end - seg.start + 1:
+                scheduler.done(seg)
+                continue
+            scheduler.failed(seg)
+            if received is not None and not self.cancel:
+                self.errors += 1
+                self.error_signal.emit(f"Part error: connection closed after {received} of {seg.end - seg.start + 1} bytes")
+            return
+    def remove_parts(self, base_filename):
+        for i in range(self.num_parts):
+            part_path = f"{base_filename}.part{i}"
+            if os.path.exists(part_path):
+                os.remove(part_path)
+    def chunk_size(self):
+        return self.chunk or (524288 if self.hpd_mode else 65536)
+    def receive(self, reader, close, path, idx):
         try:
-            r = requests.get(self.url, headers=headers, proxies=self.proxy, stream=True, timeout=10)
-            r.raise_for_status()
+            fd = self.writer.open(path)
+        except OSError as e:
+            close()
+            self.error_signal.emit("Write error: " + str(e))
+            self.cancel = True
+            return None
+        received = None
+        try:
+            received = self.receive_into(reader, fd, idx)
+        except WriterError as e:
+            self.error_signal.emit("Write error: " + str(e))
+            self.cancel = True
         except Exception as e:
-            self.error_signal.emit("Part error: " + str(e))
-            return
-        part_path = f"{base_filename}.part{idx}"
-        chunk_size = 524288 if self.hpd_mode else 65536
+            self.errors += 1
+            self.error_signal.emit("Download error: " + str(e))
+        finally:
+            close()
+            try:
+                self.writer.close(fd)
+            except WriterError:
+                received = None
+        return received
+    def receive_into(self, reader, fd, idx, base=0):
         downloaded = 0
-        with open(part_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size):
-                if self.cancel:
-                    break
-                while self.pause:
-                    time.sleep(0.1)
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    self.progress[idx] = downloaded
-                    self.emit_overall()
-        if self.cancel and os.path.exists(part_path):
-            os.remove(part_path)
+        while not self.cancel:
+            while self.pause:
+                time.sleep(0.1)
+            buf = self.buffers.acquire()
+            view = memoryview(buf)
+            filled = 0
+            try:
+                while filled < len(buf):
+                    n = reader.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+            except Exception:
+                self.buffers.release(buf)
+                raise
+            if not filled:
+                self.buffers.release(buf)
+                break
+            self.writer.write(fd, base + downloaded, view[:filled], release=lambda b=buf: self.buffers.release(b))
+            downloaded += filled
+            self.progress[idx] += filled
+            self.emit_overall()
+            if filled < len(buf):
+                break
+        return downloaded
     def emit_overall(self):
         total_downloaded = sum(self.progress)
         elapsed = time.time() - self.start_time
@@ -153,6 +463,7 @@ class DownloadThread(QThread):
     def merge_parts(self, base_filename):
         ext = self.url.split("/")[-1].split(".")[-1]
         full_filename = base_filename + f".{ext}" if ext else base_filename
+        self.output_path = full_filename
         with open(full_filename, "wb") as out_file:
             for i in range(self.num_parts):
                 part_path = f"{base_filename}.part{i}"
@@ -0,0 +1,154 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import json
+import time
+import threading
+
+PROFILES_FILE = "host_profiles.json"
+CONNECTION_STEPS = [1, 2, 4, 8, 16, 32, 64]
+CHUNK_STEPS = [65536, 262144, 524288, 1048576]
+MAX_AGE = 30 * 24 * 3600
+SMOOTHING = 0.5
+
+def pick(table, steps, default, limit=None):
+    steps = [s for s in steps if limit is None or s <= limit]
+    if not table:
+        return default, False
+    best = max(table, key=lambda k: table[k][0])
+    if best in steps:
+        i = steps.index(best)
+        for j in (i + 1, i - 1):
+            if 0 <= j < len(steps) and steps[j] not in table:
+                return steps[j], True
+    return best, False
+
+class HostProfiles:
+    def __init__(self, path=PROFILES_FILE, max_age=MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.profiles = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+        except Exception:
+            profiles = {}
+        return self.prune(profiles)
+
+    def prune(self, profiles):
+        cutoff = time.time() - self.max_age
+        return {host: p for host, p in profiles.items() if p.get("updated", 0) >= cutoff}
+
+    def save(self):
+        with self.lock:
+            self.profiles = self.prune(self.profiles)
+            data = json.dumps(self.profiles, separators=(",", ":"))
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+    def get(self, host):
+        with self.lock:
+            profile = self.profiles.get(host)
+            if profile and profile.get("updated", 0) < time.time() - self.max_age:
+                del self.profiles[host]
+                return None
+            return profile
+
+    def suggest(self, host, parts, chunk_size, max_parts=None):
+        profile = self.get(host)
+        if not profile:
+            return parts, chunk_size
+        if not profile.get("ranges", True):
+            return 1, self.table_best(profile.get("chunk", {}), chunk_size)
+        connections = {int(k): v for k, v in profile.get("conn", {}).items()}
+        best_parts, exploring = pick(connections, CONNECTION_STEPS, parts, max_parts or max(parts, 32))
+        if profile.get("err", 0) > 0.3 and not exploring:
+            best_parts = max(1, best_parts // 2)
+        chunks = {int(k): v for k, v in profile.get("chunk", {}).items()}
+        if exploring:
+            return best_parts, self.table_best(chunks, chunk_size)
+        return best_parts, pick(chunks, CHUNK_STEPS, chunk_size)[0]
+
+    def table_best(self, table, default):
+        if not table:
+            return default
+        return int(max(table, key=lambda k: table[k][0]))
+
+    def link(self, host):
+        profile = self.get(host)
+        if not profile or not profile.get("conn"):
+            return None, profile.get("rtt") if profile else None
+        conn = profile["conn"]
+        best = max(conn, key=lambda k: conn[k][0])
+        return conn[best][0] * 1024 * 1024 / int(best), profile.get("rtt")
+
+    def record(self, host, connections, chunk_size, rate, ranges, errors, rtt=None):
+        with self.lock:
+            profile = self.profiles.setdefault(host, {})
+            if rtt:
+                old = profile.get("rtt", rtt)
+                profile["rtt"] = round(old + SMOOTHING * (rtt - old), 4)
+            profile["updated"] = int(time.time())
+            profile["ranges"] = bool(ranges)
+            profile["n"] = profile.get("n", 0) + 1
+            failed = min(1.0, errors / max(1, connections))
+            profile["err"] = round(profile.get("err", failed) + SMOOTHING * (failed - profile.get("err", failed)), 3)
+            if rate > 0:
+                for key, value in (("conn", connections), ("chunk", chunk_size)):
+                    table = profile.setdefault(key, {})
+                    old = table.get(str(value))
+                    mean = rate if old is None else old[0] + SMOOTHING * (rate - old[0])
+                    table[str(value)] = [round(mean, 2), (old[1] + 1) if old else 1]
+
+    def reset(self, host=None):
+        with self.lock:
+            if host is None:
+                self.profiles.clear()
+            else:
+                self.profiles.pop(host, None)
+        self.save()
+
+    def rows(self):
+        with self.lock:
+            items = sorted(self.profiles.items())
+        rows = []
+        for host, p in items:
+            conn = p.get("conn", {})
+            best = max(conn, key=lambda k: conn[k][0]) if conn else "-"
+            rows.append({
+                "host": host,
+                "parts": best,
+                "chunk": self.table_best(p.get("chunk", {}), 0) // 1024 if p.get("chunk") else "-",
+                "rate": conn[best][0] if conn else 0,
+                "ranges": p.get("ranges", True),
+                "errors": p.get("err", 0),
+                "updated": time.strftime("%Y-%m-%d %H:%M", time.localtime(p.get("updated", 0))),
+                "downloads": p.get("n", 0)
+            })
+        return rows
@@ -24,11 +24,11 @@ ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEAL
 import os
 import json
 from datetime import datetime
+from urllib.parse import urlsplit
 from PySide6.QtWidgets import QApplication, QMessageBox, QSystemTrayIcon, QMenu
 from PySide6.QtGui import QAction, QIcon, QPixmap, QPainter, QFont
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QThread, Signal
 from ui import MainWindow
-from download_thread import DownloadThread
 from notifications import send_notification, send_error
 
 def create_tray_icon(text):
@@ -53,9 +53,20 @@ def save_history(history):
     with open("history.json", "w", encoding="utf-8") as f:
         json.dump(history, f, ensure_ascii=False)
 
-def main():
-    import sys
-    app = QApplication(sys.argv)
+class HistoryLoader(QThread):
+    loaded = Signal(list)
+    def run(self):
+        self.loaded.emit(load_history())
+
+def history_loaded(window, history):
+    pending = window.download_history
+    window.download_history = history + pending
+    window.history_loaded = True
+    if pending:
+        save_history(window.download_history)
+    window.update_history_table(window.download_history)
+
+def create_window(app):
     window = MainWindow()
     tray = QSystemTrayIcon(create_tray_icon("🔔"), window)
     tray_menu = QMenu()
@@ -67,14 +78,22 @@ def main():
     tray_menu.addAction(exit_action)
     tray.setContextMenu(tray_menu)
     tray.show()
-    history = load_history()
-    window.download_history = history
-    window.update_history_table(history)
+    window.history_loaded = False
+    window.history_loader = HistoryLoader(window)
+    window.history_loader.loaded.connect(lambda history: history_loaded(window, history))
     window.download_btn.clicked.connect(lambda: start_download(window, tray))
     window.pause_btn.clicked.connect(lambda: pause_download(window))
     window.resume_btn.clicked.connect(lambda: resume_download(window))
     window.cancel_btn.clicked.connect(lambda: cancel_download(window))
+    window.share_checkbox.toggled.connect(lambda enabled: toggle_sharing(window, enabled))
+    return window, tray
+
+def main():
+    import sys
+    app = QApplication(sys.argv)
+    window, tray = create_window(app)
     window.show()
+    window.history_loader.start()
     sys.exit(app.exec())
 
 def start_download(window, tray):
@@ -85,18 +104,42 @@ def start_download(window, tray):
         return
     mode = window.mode_combo.currentText()
     performance = window.performance_combo.currentText()
-    parts = 1 if mode == "Single Thread" else (os.cpu_count() if performance == "HPD (High Performance)" else 4)
+    hpd_mode = performance != "Normal"
+    if mode in ("Batch Download", "Mirror Sync"):
+        start_batch(window, tray, url, output_folder, hpd_mode, mirror=mode == "Mirror Sync")
+        return
+    parts = 1 if mode == "Single Thread" else (os.cpu_count() if hpd_mode else 4)
+    delta_control = url + ".zsync" if mode == "Delta Update" else None
+    processes = os.cpu_count() if performance == "HPD Multi-process" else 0
+    chunk_size = None
+    if mode != "Single Thread":
+        parts, chunk_size = window.profiles().suggest(urlsplit(url).netloc, parts, 524288 if hpd_mode else 65536, max(parts, 32))
     iso_mode = window.iso_checkbox.isChecked()
-    proxy = None
-    download_thread = DownloadThread(url, output_folder, parts, (performance == "HPD (High Performance)"), iso_mode, proxy)
+    from backends import BackendError
+    from download_thread import DownloadThread
+    from socket_tuning import SocketTuning
+    rate, rtt = window.profiles().link(urlsplit(url).netloc)
+    congestion = window.congestion_combo.currentText()
+    tuning = SocketTuning(congestion=None if congestion == "System Default" else congestion, rate=rate, rtt=rtt)
+    try:
+        proxy = proxy_pool(window)
+        sources = source_pool(window)
+    except BackendError as e:
+        QMessageBox.warning(window, "Network Settings", str(e))
+        return
+    download_thread = DownloadThread(url, output_folder, parts, hpd_mode, iso_mode, proxy, drop_cache=True if window.cache_checkbox.isChecked() else None, sources=sources, delta_control=delta_control, profiles=window.profiles(), chunk_size=chunk_size, processes=processes, peers=window.peers_input.text().strip() or None, peer_cache=window.peer_cache() if window.share_checkbox.isChecked() else None, tuning=tuning, peer_token=window.peer_token_input.text().strip() or None)
     window.download_thread = download_thread
     download_thread.progress_signal.connect(window.overall_progress_bar.setValue)
     download_thread.speed_signal.connect(lambda sp: window.speed_label.setText(f"Speed: {sp:.2f} MB/s"))
     download_thread.time_signal.connect(lambda rt: window.time_label.setText(f"Time Left: {rt:.2f} s"))
     download_thread.size_signal.connect(lambda s: window.size_label.setText(f"Size: {s / (1024*1024):.2f} MB"))
     download_thread.part_count_signal.connect(lambda c: window.parts_label.setText(f"Parts: {c}"))
+    download_thread.socket_signal.connect(lambda s: window.socket_label.setText(f"Socket: {s}"))
+    download_thread.scan_signal.connect(lambda p: window.parts_label.setText(f"Parts: scanning local copy {p}%"))
     download_thread.error_signal.connect(lambda err: QMessageBox.critical(window, "Error", err))
+    download_thread.finished.connect(window.throughput_graph.stop)
     download_thread.start()
+    window.throughput_graph.track(lambda: download_thread.progress)
     entry = {
         "url": url,
         "output_folder": output_folder,
@@ -105,11 +148,72 @@ def start_download(window, tray):
         "performance": performance,
         "parts": parts
     }
-    window.download_history.append(entry)
-    save_history(window.download_history)
-    window.update_history_table(window.download_history)
+    record_history(window, [entry])
     download_thread.progress_signal.connect(lambda p: p == 100 and send_notification(tray, "Download", "Download completed successfully."))
 
+def proxy_pool(window):
+    urls = [p.strip() for p in window.proxy_input.text().split(",") if p.strip()]
+    if not urls:
+        return None
+    from backends import make_proxy_pool
+    if window.proxy_pool is None or [r.key for r in window.proxy_pool.routes] != urls:
+        window.proxy_pool = make_proxy_pool(urls)
+    return window.proxy_pool
+
+def source_pool(window):
+    names = [s.strip() for s in window.source_input.text().split(",") if s.strip()]
+    if not names:
+        return None
+    from backends import make_source_pool
+    if window.source_pool is None or [r.key for r in window.source_pool.routes] != names:
+        window.source_pool = make_source_pool(names)
+    return window.source_pool
+
+def toggle_sharing(window, enabled):
+    if enabled and window.peer_service is None:
+        from peer_cache import PeerService
+        try:
+            window.peer_service = PeerService(window.peer_cache(), window.peer_token_input.text().strip(), host=window.share_host_input.text().strip() or None)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(window, "LAN Peers", f"Could not start the peer cache service: {e}")
+            window.share_checkbox.setChecked(False)
+            return
+        window.peer_service.start()
+    elif not enabled and window.peer_service is not None:
+        window.peer_service.stop()
+        window.peer_service = None
+
+def start_batch(window, tray, source, output_folder, hpd_mode, mirror=False):
+    from backends import BackendError
+    try:
+        proxy = proxy_pool(window)
+        sources = source_pool(window)
+    except BackendError as e:
+        QMessageBox.warning(window, "Network Settings", str(e))
+        return
+    if mirror:
+        from mirror import MirrorThread
+        batch_thread = MirrorThread(source, output_folder, hpd_mode, proxy=proxy, sources=sources)
+    else:
+        from batch import BatchThread
+        batch_thread = BatchThread(source, output_folder, hpd_mode, proxy=proxy, sources=sources)
+    window.download_thread = batch_thread
+    batch_thread.progress_signal.connect(window.overall_progress_bar.setValue)
+    batch_thread.speed_signal.connect(lambda sp: window.speed_label.setText(f"Speed: {sp:.2f} MB/s"))
+    batch_thread.files_signal.connect(lambda done, total: window.parts_label.setText(f"Files: {done}/{total}"))
+    batch_thread.error_signal.connect(lambda err: QMessageBox.critical(window, "Error", err))
+    batch_thread.history_signal.connect(lambda entries: record_history(window, entries))
+    batch_thread.finished.connect(lambda: send_notification(tray, "Download", ("Mirror sync" if mirror else "Batch download") + " finished."))
+    window.size_label.setText("Size: -")
+    window.time_label.setText("Time Left: -")
+    batch_thread.start()
+
+def record_history(window, entries):
+    window.download_history.extend(entries)
+    if window.history_loaded:
+        save_history(window.download_history)
+    window.append_history_rows(entries)
+
 def pause_download(window):
     if window.download_thread and window.download_thread.isRunning():
         window.download_thread.pause = True
@@ -0,0 +1,244 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import json
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, unquote
+import requests
+from requests.adapters import HTTPAdapter
+from batch import BatchThread, parse_listing, local_path, relative_path
+from backends import NotModified
+
+MANIFEST_FILE = ".bitcatch-mirror.json"
+SAVE_EVERY = 1000
+
+def parse_json_listing(base_url, entries):
+    dirs, files = [], {}
+    for entry in entries:
+        name = entry.get("name", "")
+        if not name or name in (".", "..") or "/" in name.rstrip("/"):
+            continue
+        if entry.get("type") == "directory":
+            dirs.append(urljoin(base_url, name.rstrip("/") + "/"))
+        else:
+            files[urljoin(base_url, name)] = f"{entry.get('mtime')}|{entry.get('size')}"
+    return dirs, files
+
+def crawl_listing(root_url, session=None, workers=4, max_depth=32, cancelled=lambda: False):
+    session = session or requests.Session()
+    files = {}
+    errors = []
+    seen = {root_url}
+    level = [root_url]
+    def list_dir(url):
+        try:
+            r = session.get(url, timeout=30)
+            r.raise_for_status()
+            if "json" in r.headers.get("content-type", ""):
+                return parse_json_listing(url, r.json())
+            return parse_listing(url, r.text)
+        except Exception as e:
+            errors.append(f"{url}: {e}")
+            return [], {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for depth in range(max_depth + 1):
+            if not level or cancelled():
+                break
+            next_level = []
+            for dirs, found in pool.map(list_dir, level):
+                files.update(found)
+                for d in dirs:
+                    if d not in seen:
+                        seen.add(d)
+                        next_level.append(d)
+            level = next_level
+    if cancelled():
+        errors.append("listing cancelled")
+    return files, errors
+
+class Manifest:
+    def __init__(self, path, root_url):
+        self.path = path
+        self.root_url = root_url
+        self.lock = threading.Lock()
+        self.files = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        return data.get("files", {}) if data.get("root") == self.root_url else {}
+
+    def save(self):
+        with self.lock:
+            data = json.dumps({"root": self.root_url, "files": self.files}, separators=(",", ":"))
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def get(self, rel):
+        with self.lock:
+            return self.files.get(rel)
+
+    def unchanged(self, rel, listed, path):
+        entry = self.get(rel)
+        if not entry or not listed or entry.get("listed") != listed:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return st.st_size == entry["size"] and int(st.st_mtime) == entry["mtime"]
+
+    def record(self, rel, path, listed, etag=None, modified=None):
+        st = os.stat(path)
+        with self.lock:
+            old = self.files.get(rel, {})
+            self.files[rel] = {"size": st.st_size, "mtime": int(st.st_mtime), "listed": listed, "etag": etag or old.get("etag"), "modified": modified or old.get("modified")}
+
+    def remove(self, rel):
+        with self.lock:
+            self.files.pop(rel, None)
+
+    def paths(self):
+        with self.lock:
+            return list(self.files)
+
+class MirrorThread(BatchThread):
+    history_mode = "Mirror"
+
+    def __init__(self, root_url, output_folder, hpd_mode=False, delete=False, max_workers=None, per_host=None, proxy=None, sources=None):
+        super().__init__(root_url if root_url.endswith("/") else root_url + "/", output_folder, hpd_mode, max_workers, per_host, proxy=proxy, sources=sources)
+        self.delete = delete
+        self.manifest = None
+        self.listing = {}
+        self.not_modified = set()
+        self.listed = 0
+        self.skipped = 0
+        self.deleted = 0
+        self.finished_files = 0
+    def run(self):
+        root_url = self.source
+        self.manifest = Manifest(os.path.join(self.output_folder, MANIFEST_FILE), root_url)
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.per_host)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.listing, errors = crawl_listing(root_url, session, self.per_host, cancelled=lambda: self.cancel)
+        self.listed = len(self.listing)
+        if not self.listing and errors:
+            self.error_signal.emit("Mirror listing error: " + errors[0])
+            return
+        urls = [url for url, listed in self.listing.items() if not self.manifest.unchanged(self.relative(url), listed, local_path(url, self.output_folder, root_url))]
+        self.skipped = self.listed - len(urls)
+        os.makedirs(self.output_folder, exist_ok=True)
+        if urls:
+            self.transfer(urls, root_url)
+        else:
+            self.files_signal.emit(0, 0)
+            self.progress_signal.emit(100)
+        if self.delete and not errors and not self.cancel:
+            self.remove_stale()
+        try:
+            self.manifest.save()
+        except OSError as e:
+            self.error_signal.emit("Mirror manifest error: " + str(e))
+        if errors:
+            self.error_signal.emit(f"{len(errors)} directory listings failed, nothing was deleted. First error: {errors[0]}")
+    def relative(self, url):
+        return unquote(url[len(self.source):])
+    def fetch(self, host, url, path):
+        rel = self.relative(url)
+        entry = self.manifest.get(rel)
+        headers = {}
+        if entry and os.path.isfile(path) and os.path.getsize(path) == entry["size"]:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("modified"):
+                headers["If-Modified-Since"] = entry["modified"]
+        try:
+            reader, close = self.backend(host, url).open_range(url, 0, None, headers)
+        except NotModified:
+            self.manifest.record(rel, path, self.listing.get(url))
+            with self.lock:
+                self.not_modified.add(url)
+            return
+        response = getattr(reader, "headers", {})
+        temp = self.save(reader, close, path)
+        if temp is None:
+            return
+        modified = response.get("last-modified")
+        try:
+            stamp = parsedate_to_datetime(modified).timestamp() if modified else None
+        except (TypeError, ValueError):
+            stamp = None
+        if stamp:
+            os.utime(temp, (stamp, stamp))
+        os.replace(temp, path)
+        self.manifest.record(rel, path, self.listing.get(url), response.get("etag"), modified)
+    def finish(self, url, ok):
+        with self.lock:
+            unchanged = url in self.not_modified
+            self.finished_files += 1
+            save = self.finished_files % SAVE_EVERY == 0
+        if save:
+            try:
+                self.manifest.save()
+            except OSError:
+                pass
+        if not unchanged:
+            super().finish(url, ok)
+            return
+        with self.lock:
+            self.done += 1
+        self.emit_overall()
+    def remove_stale(self):
+        listed = {self.relative(url) for url in self.listing}
+        root = os.path.abspath(self.output_folder)
+        for rel in self.manifest.paths():
+            if rel in listed:
+                continue
+            path = relative_path(rel, self.output_folder)
+            try:
+                os.remove(path)
+                self.deleted += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            self.manifest.remove(rel)
+            parent = os.path.dirname(os.path.abspath(path))
+            while parent != root and parent.startswith(root):
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    break
+                parent = os.path.dirname(parent)
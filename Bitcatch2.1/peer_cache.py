@@ -0,0 +1,261 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import hmac
+import json
+import time
+import socket
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qs, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+
+CACHE_FILE = "peer_cache.json"
+PEER_PORT = 8765
+DISCOVERY_PORT = 8766
+DISCOVERY_MAGIC = b"BITCATCH-PEER 1"
+
+def file_digest(path, cancelled=lambda: False, algorithm="sha256"):
+    h = hashlib.new(algorithm)
+    buf = bytearray(1024 * 1024)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while not cancelled():
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.hexdigest()
+
+class PeerCache:
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries, separators=(",", ":"))
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp, self.path)
+
+    def add(self, url, path, etag=None, modified=None, digest=None):
+        entry = {"path": os.path.abspath(path), "size": os.path.getsize(path), "mtime": os.path.getmtime(path), "etag": etag, "modified": modified, "sha256": digest or file_digest(path)}
+        with self.lock:
+            self.entries[url] = entry
+
+    def lookup(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(entry["path"])
+        except OSError:
+            st = None
+        if st is None or st.st_size != entry["size"] or st.st_mtime != entry["mtime"]:
+            with self.lock:
+                self.entries.pop(url, None)
+            return None
+        return entry
+
+class PeerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request(True)
+
+    def do_HEAD(self):
+        self.handle_request(False)
+
+    def handle_request(self, body):
+        if not hmac.compare_digest(self.headers.get("Authorization", "").encode(), b"Bearer " + self.server.token.encode()):
+            self.send_error(401)
+            return
+        parts = urlsplit(self.path)
+        url = parse_qs(parts.query).get("url", [""])[0]
+        entry = self.server.cache.lookup(url) if url else None
+        if entry is None:
+            self.send_error(404)
+            return
+        if parts.path == "/lookup":
+            data = json.dumps({k: entry[k] for k in ("size", "etag", "modified", "sha256")}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if body:
+                self.wfile.write(data)
+        elif parts.path == "/file":
+            self.send_file(entry, body)
+        else:
+            self.send_error(404)
+
+    def send_file(self, entry, body):
+        size = entry["size"]
+        start, end = 0, size - 1
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            first, _, last = rng[6:].partition("-")
+            try:
+                start = int(first) if first else 0
+                end = min(int(last), end) if last else end
+            except ValueError:
+                self.send_error(416)
+                return
+            if start > end:
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if body:
+            with open(entry["path"], "rb") as f:
+                self.connection.sendfile(f, start, end - start + 1)
+
+def lan_address():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect(("192.0.2.1", 9))
+        return sock.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+    finally:
+        sock.close()
+
+class PeerService:
+    def __init__(self, cache, token, port=PEER_PORT, host=None, discovery=True):
+        if not token:
+            raise ValueError("sharing with LAN peers needs a shared token")
+        self.cache = cache
+        self.host = host or lan_address()
+        self.server = ThreadingHTTPServer((self.host, port), PeerHandler)
+        self.server.daemon_threads = True
+        self.server.cache = cache
+        self.server.token = token
+        self.port = self.server.server_port
+        self.udp = None
+        if discovery:
+            self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.udp.bind(("", DISCOVERY_PORT))
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if self.udp:
+            threading.Thread(target=self.answer, daemon=True).start()
+
+    def answer(self):
+        while True:
+            try:
+                data, addr = self.udp.recvfrom(512)
+            except OSError:
+                return
+            if data == DISCOVERY_MAGIC + b"?":
+                try:
+                    self.udp.sendto(DISCOVERY_MAGIC + b" " + str(self.port).encode(), addr)
+                except OSError:
+                    pass
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.udp:
+            self.udp.close()
+
+def discover(timeout=1.0, port=DISCOVERY_PORT):
+    peers = []
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.settimeout(timeout)
+        sock.sendto(DISCOVERY_MAGIC + b"?", ("<broadcast>", port))
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            sock.settimeout(max(0.01, deadline - time.time()))
+            try:
+                data, addr = sock.recvfrom(512)
+            except socket.timeout:
+                break
+            prefix = DISCOVERY_MAGIC + b" "
+            if data.startswith(prefix) and data[len(prefix):].isdigit():
+                peer = f"{addr[0]}:{int(data[len(prefix):])}"
+                if peer not in peers:
+                    peers.append(peer)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+    return peers
+
+def peer_list(spec):
+    names = [p.strip() for p in spec.split(",") if p.strip()] if isinstance(spec, str) else list(spec or ())
+    peers = []
+    for name in names:
+        for peer in (discover() if name == "auto" else [name if ":" in name else f"{name}:{PEER_PORT}"]):
+            if peer not in peers:
+                peers.append(peer)
+    return peers
+
+def find_peers(peers, url, size, digest, etag=None, modified=None, token=None, timeout=2.0):
+    found = []
+    headers = {"Authorization": "Bearer " + token} if token else {}
+    def ask(peer):
+        try:
+            r = requests.get(f"http://{peer}/lookup", params={"url": url}, headers=headers, timeout=timeout, proxies={"http": None})
+            if r.status_code != 200:
+                return
+            entry = r.json()
+        except (requests.RequestException, ValueError):
+            return
+        if entry.get("size") != size:
+            return
+        if (etag and entry.get("etag") != etag) or (modified and entry.get("modified") != modified):
+            return
+        if digest[0] == "sha256" and entry.get("sha256") != digest[1]:
+            return
+        found.append(peer)
+    threads = [threading.Thread(target=ask, args=(peer,)) for peer in peers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return [f"http://{peer}/file?url={quote(url, safe='')}" for peer in peers if peer in found]
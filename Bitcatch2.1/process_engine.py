@@ -0,0 +1,162 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+import queue
+import threading
+import multiprocessing
+import multiprocessing.connection
+from route_pool import RoutePool
+from disk_writer import DiskWriter, BufferPool
+from backends import backend_for
+from scheduler import segment_scheduler
+
+CANCEL, PAUSE, FAILED = 0, 1, 2
+
+def route_keys(pool):
+    if isinstance(pool, RoutePool):
+        return [r.key for r in pool.healthy_routes() or pool.routes]
+    return pool
+
+def worker(url, path, size, segment_size, cursor, counters, slots, control, errors, options, budget, drop_cache):
+    chunk_size = options["chunk_size"]
+    backend = backend_for(url, **options)
+    writer = DiskWriter(budget=budget, drop_cache=drop_cache)
+    buffers = BufferPool(chunk_size, max(4, budget // chunk_size))
+    scheduler = segment_scheduler(size, segment_size, cursor)
+    def fetch(slot):
+        while not control[CANCEL] and not control[FAILED]:
+            seg = scheduler.claim()
+            if seg is None:
+                if scheduler.exhausted():
+                    return
+                time.sleep(0.1)
+                continue
+            if receive(slot, seg):
+                scheduler.done(seg)
+            elif not control[CANCEL] and not scheduler.failed(seg):
+                control[FAILED] = 1
+    def receive(slot, seg):
+        try:
+            reader, close = backend.open_range(url, seg.pos, seg.end)
+        except Exception as e:
+            errors.put(f"Segment {seg.pos}-{seg.end}: {e}")
+            return False
+        try:
+            while seg.pos <= seg.end and not control[CANCEL] and not control[FAILED]:
+                while control[PAUSE] and not control[CANCEL]:
+                    time.sleep(0.1)
+                buf = buffers.acquire()
+                view = memoryview(buf)
+                want = min(len(buf), seg.remaining())
+                filled = 0
+                error = None
+                try:
+                    while filled < want:
+                        n = reader.readinto(view[filled:want])
+                        if not n:
+                            break
+                        filled += n
+                except Exception as e:
+                    error = e
+                start = seg.pos
+                filled = scheduler.advance(seg, filled)
+                if filled:
+                    writer.write(fd, start, view[:filled], release=lambda b=buf: buffers.release(b))
+                    counters[slot] += filled
+                else:
+                    buffers.release(buf)
+                if error is not None:
+                    errors.put(f"Segment {seg.pos}-{seg.end}: {error}")
+                    return False
+                if filled < want:
+                    errors.put(f"Segment {seg.pos}-{seg.end}: connection closed early")
+                    return False
+            return True
+        finally:
+            close()
+    try:
+        fd = writer.open(path, truncate=False)
+        threads = [threading.Thread(target=fetch, args=(slot,)) for slot in slots]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.close(fd)
+    except Exception as e:
+        errors.put(str(e))
+        control[FAILED] = 1
+    finally:
+        writer.shutdown()
+        backend.close()
+
+class ProcessEngine:
+    def __init__(self, url, path, size, processes, connections, options, segment_size=8 * 1024 * 1024, budget=128 * 1024 * 1024, drop_cache=False):
+        ctx = multiprocessing.get_context("spawn")
+        self.processes = max(1, min(processes, connections))
+        per_process = -(-connections // self.processes)
+        self.counters = ctx.RawArray("q", self.processes * per_process)
+        self.control = ctx.RawArray("b", 3)
+        self.cursor = ctx.Value("q", 0)
+        self.errors = ctx.Queue()
+        self.received = []
+        options = dict(options, connections=per_process, proxy=route_keys(options.get("proxy")), sources=route_keys(options.get("sources")))
+        self.workers = [ctx.Process(target=worker, args=(url, path, size, segment_size, self.cursor, self.counters, range(i * per_process, (i + 1) * per_process), self.control, self.errors, options, budget // self.processes, drop_cache), daemon=True) for i in range(self.processes)]
+
+    def start(self):
+        for p in self.workers:
+            p.start()
+
+    def wait(self, timeout):
+        # a child cannot exit while its queue feeder still holds data, so read while waiting
+        deadline = time.monotonic() + timeout
+        while True:
+            self.drain()
+            alive = [p.sentinel for p in self.workers if p.is_alive()]
+            if not alive:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            multiprocessing.connection.wait(alive, min(remaining, 0.05))
+
+    def drain(self):
+        while True:
+            try:
+                self.received.append(self.errors.get_nowait())
+            except queue.Empty:
+                return
+
+    def set_state(self, cancel, pause):
+        self.control[CANCEL] = int(cancel)
+        self.control[PAUSE] = int(pause)
+
+    def failed(self):
+        return bool(self.control[FAILED]) or any(p.exitcode for p in self.workers)
+
+    def messages(self):
+        while True:
+            try:
+                self.received.append(self.errors.get(timeout=0.05))
+            except queue.Empty:
+                return list(self.received)
@@ -0,0 +1,156 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+import queue
+import socket
+import threading
+from route_pool import RoutePool
+
+DNS_TTL = 300
+NEGATIVE_TTL = 30
+RACE_DELAY = 0.25
+
+def system_lookup(host, port):
+    addrs = []
+    for family, _, _, _, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        if (family, sockaddr[0]) not in addrs:
+            addrs.append((family, sockaddr[0]))
+    return addrs
+
+def interleave(addrs):
+    v6 = [a for a in addrs if a[0] == socket.AF_INET6]
+    v4 = [a for a in addrs if a[0] != socket.AF_INET6]
+    first, second = (v6, v4) if addrs and addrs[0][0] == socket.AF_INET6 else (v4, v6)
+    mixed = []
+    for i in range(max(len(first), len(second))):
+        mixed.extend(x[i] for x in (first, second) if i < len(x))
+    return mixed
+
+def connect(family, ip, port, timeout=None, source_address=None, socket_options=None):
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        for option in socket_options or ():
+            sock.setsockopt(*option)
+        if timeout is not None:
+            sock.settimeout(timeout)
+        if source_address:
+            sock.bind(source_address)
+        sock.connect((ip, port))
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+def race(addrs, port, timeout=None, source_address=None, socket_options=None, delay=RACE_DELAY):
+    if not addrs:
+        raise OSError(f"no addresses to connect to on port {port}")
+    if len(addrs) == 1:
+        return connect(addrs[0][0], addrs[0][1], port, timeout, source_address, socket_options)
+    results = queue.Queue()
+    def attempt(family, ip):
+        try:
+            results.put((connect(family, ip, port, timeout, source_address, socket_options), None))
+        except OSError as e:
+            results.put((None, e))
+    def discard(count):
+        for _ in range(count):
+            sock, _ = results.get()
+            if sock:
+                sock.close()
+    started = finished = 0
+    error = None
+    pending = list(addrs)
+    while finished < started or pending:
+        if pending:
+            family, ip = pending.pop(0)
+            threading.Thread(target=attempt, args=(family, ip), daemon=True).start()
+            started += 1
+        try:
+            sock, err = results.get(timeout=delay if pending else timeout)
+        except queue.Empty:
+            if pending:
+                continue
+            break
+        finished += 1
+        if sock:
+            threading.Thread(target=discard, args=(started - finished,), daemon=True).start()
+            return sock
+        error = err
+    raise error or socket.timeout(f"connection to port {port} timed out")
+
+class Resolver:
+    def __init__(self, lookup=system_lookup, ttl=DNS_TTL, negative_ttl=NEGATIVE_TTL):
+        self.lookup = lookup
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = {}
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def resolve(self, host, port):
+        key = (host.lower(), port)
+        now = time.time()
+        with self.lock:
+            entry = self.cache.get(key)
+        if entry and entry[0] > now:
+            if isinstance(entry[1], Exception):
+                raise entry[1]
+            return entry[1]
+        try:
+            addrs = interleave(self.lookup(host, port))
+            if not addrs:
+                raise socket.gaierror(f"no addresses for {host}")
+        except OSError as e:
+            with self.lock:
+                self.cache[key] = (now + self.negative_ttl, e)
+            raise
+        with self.lock:
+            self.cache[key] = (now + self.ttl, addrs)
+        return addrs
+
+    def pool_for(self, host, port):
+        addrs = self.resolve(host, port)
+        key = (host.lower(), port)
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool is None or [r.key for r in pool.routes] != addrs:
+                old = {r.key: r for r in pool.routes} if pool else {}
+                pool = RoutePool(addrs)
+                pool.routes = [old.get(r.key, r) for r in pool.routes]
+                self.pools[key] = pool
+        return pool
+
+    def mark_failed(self, host, port, addr):
+        with self.lock:
+            pool = self.pools.get((host.lower(), port))
+        for route in pool.routes if pool else ():
+            if route.key == addr:
+                pool.mark(route, False)
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.pools.clear()
+
+default_resolver = Resolver()
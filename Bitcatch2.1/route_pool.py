@@ -0,0 +1,120 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+import threading
+
+class Route:
+    def __init__(self, key):
+        self.key = key
+        self.active = 0
+        self.rate = 0.0
+        self.bytes = 0
+        self.failures = 0
+        self.down_until = 0.0
+
+    def healthy(self, now=None):
+        return self.down_until <= (now or time.time())
+
+    def stats(self):
+        return {"key": str(self.key), "active": self.active, "rate": self.rate, "bytes": self.bytes, "failures": self.failures, "healthy": self.healthy()}
+
+class RoutePool:
+    def __init__(self, keys, max_failures=3, retry_after=30.0, smoothing=0.3):
+        self.routes = [Route(k) for k in keys]
+        self.max_failures = max_failures
+        self.retry_after = retry_after
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.routes)
+
+    def acquire(self, exclude=()):
+        now = time.time()
+        with self.lock:
+            candidates = [r for r in self.routes if r.healthy(now) and r not in exclude]
+            if not candidates:
+                candidates = [min(self.routes, key=lambda r: (r in exclude, r.down_until))]
+            known = [r.rate for r in candidates if r.rate > 0]
+            explore = max(known) if known else 1.0
+            route = min(candidates, key=lambda r: (r.active + 1) / (r.rate or explore))
+            route.active += 1
+            return route
+
+    def release(self, route, nbytes=0, seconds=0.0, ok=True):
+        with self.lock:
+            route.active -= 1
+            route.bytes += nbytes
+            if ok and route.healthy():
+                route.failures = 0
+                route.down_until = 0.0
+                if nbytes and seconds > 0:
+                    rate = nbytes / seconds
+                    route.rate = rate if not route.rate else route.rate + self.smoothing * (rate - route.rate)
+            elif not ok:
+                self.fail(route)
+
+    def fail(self, route):
+        route.failures += 1
+        if route.failures >= self.max_failures:
+            route.down_until = time.time() + self.retry_after
+
+    def mark(self, route, ok, rate=0.0):
+        with self.lock:
+            if ok:
+                route.failures = 0
+                route.down_until = 0.0
+                if rate and not route.rate:
+                    route.rate = rate
+            else:
+                route.failures = self.max_failures - 1
+                self.fail(route)
+
+    def healthy_routes(self):
+        now = time.time()
+        with self.lock:
+            return [r for r in self.routes if r.healthy(now)]
+
+    def stats(self):
+        with self.lock:
+            return [r.stats() for r in self.routes]
+
+class MeteredReader:
+    def __init__(self, reader):
+        self.reader = reader
+        self.bytes = 0
+        self.failed = False
+        self.started = time.time()
+
+    def readinto(self, view):
+        try:
+            n = self.reader.readinto(view)
+        except Exception:
+            self.failed = True
+            raise
+        self.bytes += n
+        return n
+
+    def elapsed(self):
+        return time.time() - self.started
@@ -0,0 +1,168 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+import threading
+from collections import deque
+
+SEGMENT_RETRIES = 3
+SPLIT_MIN = 1024 * 1024
+LAG_FACTOR = 4
+LAG_AGE = 1.0
+
+class Segment:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.pos = start
+        self.attempts = 0
+        self.since = (0.0, start)
+
+    def remaining(self):
+        return self.end - self.pos + 1
+
+class Cursor:
+    def __init__(self, value=0):
+        self.value = value
+        self.lock = threading.Lock()
+
+    def get_lock(self):
+        return self.lock
+
+class SegmentScheduler:
+    def __init__(self, size, segment_size, retries=SEGMENT_RETRIES, window=None, split_min=None, cursor=None, clock=time.monotonic):
+        self.size = size
+        self.segment_size = max(1, segment_size)
+        self.retries = retries
+        self.window = window
+        self.split_min = split_min
+        self.clock = clock
+        self.cursor = cursor if cursor is not None else Cursor()
+        self.floor = 0
+        self.active = []
+        self.retry = deque()
+        self.splits = 0
+        self.broken = False
+        self.lock = threading.Lock()
+
+    def claim(self):
+        with self.lock:
+            if self.broken:
+                return None
+            if self.retry:
+                seg = self.retry.popleft()
+            else:
+                seg = self.next_segment() or self.split()
+                if seg is None:
+                    return None
+            seg.since = (self.clock(), seg.pos)
+            self.active.append(seg)
+            return seg
+
+    def next_segment(self):
+        with self.cursor.get_lock():
+            start = self.cursor.value
+            if start >= self.size or (self.window is not None and start >= self.floor + self.window):
+                return None
+            end = min(start + self.segment_size, self.size)
+            self.cursor.value = end
+        return Segment(start, end - 1)
+
+    def splittable(self):
+        return [s for s in self.active if s.remaining() >= 2 * self.split_min] if self.split_min else []
+
+    def rate(self, seg, now):
+        started, pos = seg.since
+        return (seg.pos - pos) / (now - started) if now - started >= LAG_AGE else None
+
+    def split(self):
+        if not self.split_min or not self.active:
+            return None
+        # the segment nearest the read cursor holds up everything behind it
+        head = min(self.active, key=lambda s: s.pos)
+        now = self.clock()
+        rate = self.rate(head, now)
+        others = sorted(r for r in (self.rate(s, now) for s in self.active if s is not head) if r is not None)
+        if head.remaining() > 0 and rate is not None and others and rate * LAG_FACTOR < others[len(others) // 2]:
+            tail = Segment(head.pos, head.end)
+            head.end = head.pos - 1
+            self.splits += 1
+            return tail
+        candidates = self.splittable()
+        if not candidates:
+            return None
+        seg = min(candidates, key=lambda s: s.pos)
+        mid = seg.pos + seg.remaining() // 2
+        tail = Segment(mid, seg.end)
+        seg.end = mid - 1
+        self.splits += 1
+        return tail
+
+    def advance(self, seg, n):
+        with self.lock:
+            n = max(0, min(n, seg.end - seg.pos + 1))
+            seg.pos += n
+            return n
+
+    def done(self, seg):
+        with self.lock:
+            if seg in self.active:
+                self.active.remove(seg)
+
+    def failed(self, seg):
+        with self.lock:
+            if seg in self.active:
+                self.active.remove(seg)
+            seg.attempts += 1
+            if seg.attempts > self.retries:
+                self.broken = True
+                return False
+            self.retry.append(seg)
+            return True
+
+    def release(self, floor):
+        with self.lock:
+            self.floor = floor
+
+    def lowest(self):
+        with self.lock:
+            return min([s.pos for s in self.active] + [s.pos for s in self.retry] + [self.cursor.value])
+
+    def exhausted(self):
+        with self.lock:
+            if self.broken:
+                return True
+            return not self.retry and self.cursor.value >= self.size and not self.splittable()
+
+    def complete(self):
+        with self.lock:
+            return not self.broken and not self.retry and not self.active and self.cursor.value >= self.size
+
+def part_scheduler(size, parts):
+    return SegmentScheduler(size, -(-size // max(1, parts)), retries=0)
+
+def segment_scheduler(size, segment_size, cursor=None):
+    return SegmentScheduler(size, segment_size, split_min=SPLIT_MIN, cursor=cursor)
+
+def stream_scheduler(size, segment_size, window):
+    return SegmentScheduler(size, segment_size, window=window * segment_size, split_min=SPLIT_MIN)
@@ -0,0 +1,254 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import math
+import random
+from scheduler import part_scheduler, segment_scheduler, stream_scheduler
+
+MB = 1024 * 1024
+
+class Link:
+    def __init__(self, bandwidth, rtt=0.05, jitter=0.0, reset_every=None, throttle_after=None, throttle_rate=None):
+        self.bandwidth = bandwidth
+        self.rtt = rtt
+        self.jitter = jitter
+        self.reset_every = reset_every
+        self.throttle_after = throttle_after
+        self.throttle_rate = throttle_rate
+
+class FakeServer:
+    def __init__(self, size, links, ranges=True, bandwidth=None, max_connections=None):
+        self.size = size
+        self.links = links
+        self.ranges = ranges
+        self.bandwidth = bandwidth
+        self.max_connections = max_connections
+
+    def link(self, slot):
+        return self.links[slot % len(self.links)]
+
+class Connection:
+    def __init__(self, slot, link):
+        self.slot = slot
+        self.link = link
+        self.request = None
+        self.tokens = link.throttle_after
+        self.ready_at = 0.0
+        self.rate = 0.0
+        self.reset_at = None
+        self.opened = False
+
+class Result:
+    def __init__(self, policy, completed, elapsed, transferred, wasted, requests, failures):
+        self.policy = policy
+        self.completed = completed
+        self.elapsed = elapsed
+        self.transferred = transferred
+        self.wasted = wasted
+        self.requests = requests
+        self.failures = failures
+
+    def row(self):
+        state = "done" if self.completed else "FAILED"
+        return f"{self.policy:>9} {state:>6} {self.elapsed / 60:9.1f} min {self.transferred / MB:10.1f} MB {self.wasted / MB:9.1f} MB wasted {self.requests:6d} req {self.failures:5d} fail"
+
+class Simulation:
+    def __init__(self, server, policy, connections, seed=0):
+        self.server = server
+        self.policy = policy
+        self.policy.scheduler.clock = self.clock
+        self.connections = [Connection(i, server.link(i)) for i in range(max(1, connections))]
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.transferred = 0
+        self.wasted = 0
+        self.requests = 0
+        self.failures = 0
+
+    def clock(self):
+        return self.now
+
+    def issue(self, conn):
+        request = self.policy.next_request(conn.slot)
+        conn.request = request
+        if request is None:
+            return
+        self.requests += 1
+        link = conn.link
+        if not conn.opened:
+            conn.tokens = link.throttle_after
+        conn.ready_at = self.now + link.rtt * (1 if conn.opened else 2)
+        conn.opened = True
+        if self.server.max_connections is not None and sum(1 for c in self.connections if c.request) > self.server.max_connections:
+            self.abort(conn, "server refused the connection")
+            return
+        if not self.server.ranges and (request.start > 0 or request.end < self.server.size - 1):
+            self.wasted += min(self.server.size, int(link.bandwidth * link.rtt))
+            self.abort(conn, "server ignored the Range request")
+            return
+        conn.reset_at = request.pos + int(self.rng.expovariate(1.0 / link.reset_every)) if link.reset_every else None
+        conn.rate = link.bandwidth * (1 + self.rng.uniform(-link.jitter, link.jitter))
+
+    def abort(self, conn, reason):
+        request = conn.request
+        conn.request = None
+        conn.opened = False
+        self.failures += 1
+        self.policy.failed(conn.slot, request, reason)
+        if conn.request is None:
+            self.issue(conn)
+
+    def rates(self, active):
+        caps = {}
+        for conn in active:
+            throttled = conn.tokens is not None and conn.tokens < 1
+            caps[conn] = min(conn.rate, conn.link.throttle_rate) if throttled else conn.rate
+        if self.server.bandwidth is None:
+            return caps
+        budget = self.server.bandwidth
+        shares = {}
+        pending = sorted(caps, key=caps.get)
+        while pending:
+            fair = budget / len(pending)
+            conn = pending.pop(0)
+            shares[conn] = min(caps[conn], fair)
+            budget -= shares[conn]
+        return shares
+
+    def run(self, limit=30 * 24 * 3600.0):
+        for conn in self.connections:
+            self.issue(conn)
+        while not self.policy.finished() and self.now < limit:
+            waiting = [c for c in self.connections if c.request and c.ready_at > self.now]
+            active = [c for c in self.connections if c.request and c.ready_at <= self.now]
+            if not waiting and not active:
+                break
+            rates = self.rates(active)
+            step = min([c.ready_at - self.now for c in waiting] + [math.inf])
+            for conn in active:
+                r = conn.request
+                rate = rates[conn]
+                if rate <= 0:
+                    continue
+                until = r.remaining()
+                if conn.reset_at is not None:
+                    until = min(until, conn.reset_at - r.pos)
+                step = min(step, max(until, 1) / rate)
+                if conn.tokens is not None and conn.tokens >= 1 and rate > conn.link.throttle_rate:
+                    step = min(step, conn.tokens / (rate - conn.link.throttle_rate))
+            if step == math.inf:
+                break
+            self.now += step
+            for conn in self.connections:
+                if conn.tokens is not None:
+                    conn.tokens = min(conn.link.throttle_after, conn.tokens + conn.link.throttle_rate * step)
+            for conn in active:
+                r = conn.request
+                n = min(r.remaining(), max(1, round(rates[conn] * step))) if rates[conn] > 0 else 0
+                if conn.tokens is not None:
+                    conn.tokens = max(0.0, conn.tokens - n)
+                self.transferred += n
+                self.wasted += n - self.policy.received(conn.slot, r, n)
+            for conn in active:
+                r = conn.request
+                if r.remaining() <= 0:
+                    conn.request = None
+                    self.policy.done(conn.slot, r)
+                    self.issue(conn)
+                elif conn.reset_at is not None and r.pos >= conn.reset_at:
+                    self.abort(conn, f"connection reset at byte {r.pos}")
+            for conn in self.connections:
+                if conn.request is None and not self.policy.finished():
+                    self.issue(conn)
+        completed = self.policy.complete()
+        wasted = self.wasted + (0 if completed else self.transferred)
+        return Result(self.policy.name, completed, self.now, self.transferred, wasted, self.requests, self.failures)
+
+class SchedulerPolicy:
+    def __init__(self, name, scheduler, stream=False):
+        self.name = name
+        self.scheduler = scheduler
+        self.stream = stream
+
+    def next_request(self, slot):
+        return self.scheduler.claim()
+
+    def received(self, slot, segment, n):
+        n = self.scheduler.advance(segment, n)
+        self.consume()
+        return n
+
+    def done(self, slot, segment):
+        self.scheduler.done(segment)
+        self.consume()
+
+    def consume(self):
+        if self.stream:
+            self.scheduler.release(self.scheduler.lowest())
+
+    def failed(self, slot, segment, reason):
+        self.scheduler.failed(segment)
+
+    def complete(self):
+        return self.scheduler.complete()
+
+    def finished(self):
+        return self.scheduler.broken or self.scheduler.complete()
+
+POLICIES = {
+    "single": lambda size, connections: SchedulerPolicy("single", part_scheduler(size, 1)),
+    "split": lambda size, connections: SchedulerPolicy("split", part_scheduler(size, connections)),
+    "segments": lambda size, connections: SchedulerPolicy("segments", segment_scheduler(size, 8 * MB)),
+    "stream": lambda size, connections: SchedulerPolicy("stream", stream_scheduler(size, 4 * MB, connections * 2 + 2), stream=True)
+}
+
+def scenario_baseline():
+    return FakeServer(8 * 1024 * MB, [Link(2 * MB)])
+
+def scenario_slow_connection():
+    return FakeServer(8 * 1024 * MB, [Link(0.1 * MB)] + [Link(2 * MB)] * 7)
+
+def scenario_resets():
+    return FakeServer(8 * 1024 * MB, [Link(2 * MB, reset_every=300 * MB)])
+
+def scenario_no_range():
+    return FakeServer(2 * 1024 * MB, [Link(2 * MB)], ranges=False)
+
+def scenario_throttle():
+    return FakeServer(8 * 1024 * MB, [Link(4 * MB, throttle_after=64 * MB, throttle_rate=0.25 * MB)])
+
+def scenario_shared_uplink():
+    return FakeServer(8 * 1024 * MB, [Link(4 * MB, jitter=0.5)], bandwidth=10 * MB)
+
+SCENARIOS = {
+    "baseline": scenario_baseline,
+    "slow-connection": scenario_slow_connection,
+    "resets": scenario_resets,
+    "no-range": scenario_no_range,
+    "throttle": scenario_throttle,
+    "shared-uplink": scenario_shared_uplink
+}
+
+def simulate(scenario, policy, connections=8, seed=0):
+    server = SCENARIOS[scenario]()
+    return Simulation(server, POLICIES[policy](server.size, connections), connections, seed).run()
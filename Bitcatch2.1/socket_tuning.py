@@ -0,0 +1,164 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import struct
+import socket
+import threading
+
+DEFAULT_RATE = 25 * 1024 * 1024
+RCVBUF_MIN = 256 * 1024
+RCVBUF_MAX = 64 * 1024 * 1024
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 15
+KEEPALIVE_COUNT = 4
+
+def sysctl(name):
+    try:
+        with open("/proc/sys/" + name.replace(".", "/"), "r") as f:
+            return f.read().split()
+    except OSError:
+        return []
+
+def congestion_algorithms():
+    if not hasattr(socket, "TCP_CONGESTION"):
+        return []
+    return sysctl("net.ipv4.tcp_allowed_congestion_control")
+
+def rcvbuf_limits():
+    rmem = sysctl("net.ipv4.tcp_rmem")
+    rmem_max = sysctl("net.core.rmem_max")
+    if len(rmem) == 3 and rmem_max:
+        return int(rmem[1]), int(rmem_max[0]), int(rmem[2])
+    return 65536, RCVBUF_MAX, 0
+
+def tcp_info_rtt(sock):
+    if not hasattr(socket, "TCP_INFO"):
+        return None
+    try:
+        info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 104)
+    except OSError:
+        return None
+    if len(info) < 72:
+        return None
+    rtt = struct.unpack_from("I", info, 68)[0]
+    return rtt / 1e6 if rtt else None
+
+class SocketTuning:
+    def __init__(self, rcvbuf="auto", keepalive=True, nodelay=True, congestion=None, rate=None, rtt=None, measure=True):
+        self.rcvbuf = rcvbuf
+        self.keepalive = keepalive
+        self.nodelay = nodelay
+        self.requested_congestion = congestion
+        self.congestion = congestion if congestion in congestion_algorithms() else None
+        self.rate = rate or DEFAULT_RATE
+        self.rtt = rtt
+        self.measure = measure
+        self.applied = {}
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def settings(self):
+        return {"rcvbuf": self.rcvbuf, "keepalive": self.keepalive, "nodelay": self.nodelay, "congestion": self.requested_congestion, "rate": self.rate, "rtt": self.rtt, "measure": self.measure}
+
+    def observe_rtt(self, seconds):
+        if self.measure and seconds and seconds > 0:
+            with self.lock:
+                self.rtt = seconds if self.rtt is None else min(self.rtt, seconds)
+
+    def rcvbuf_size(self):
+        if self.rcvbuf != "auto":
+            return self.rcvbuf or None
+        if not self.rtt:
+            return None
+        wanted = max(int(2 * self.rate * self.rtt), RCVBUF_MIN)
+        initial, limit, autotune = rcvbuf_limits()
+        if wanted <= 2 * initial:
+            return None
+        if wanted > limit and autotune > limit:
+            return None
+        return min(wanted, limit)
+
+    def options(self):
+        options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, int(bool(self.nodelay)))]
+        size = self.rcvbuf_size()
+        if size:
+            options.append((socket.SOL_SOCKET, socket.SO_RCVBUF, size))
+        if self.keepalive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            idle = getattr(socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None))
+            if idle is not None:
+                options.append((socket.IPPROTO_TCP, idle, KEEPALIVE_IDLE))
+            if hasattr(socket, "TCP_KEEPINTVL"):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL))
+            if hasattr(socket, "TCP_KEEPCNT"):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT))
+        if self.congestion:
+            options.append((socket.IPPROTO_TCP, socket.TCP_CONGESTION, self.congestion.encode()))
+        return options
+
+    def merge(self, options):
+        tuned = self.options()
+        keys = {(level, name) for level, name, _ in tuned}
+        return [o for o in options or () if (o[0], o[1]) not in keys] + tuned
+
+    def inspect(self, sock, connect_time=None):
+        applied = {"rcvbuf_requested": self.rcvbuf_size()}
+        for key, level, name in (("rcvbuf", socket.SOL_SOCKET, socket.SO_RCVBUF), ("nodelay", socket.IPPROTO_TCP, socket.TCP_NODELAY), ("keepalive", socket.SOL_SOCKET, socket.SO_KEEPALIVE)):
+            try:
+                applied[key] = sock.getsockopt(level, name)
+            except OSError:
+                pass
+        if hasattr(socket, "TCP_CONGESTION"):
+            try:
+                applied["congestion"] = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_CONGESTION, 16).split(b"\0")[0].decode()
+            except OSError:
+                pass
+        self.observe_rtt(tcp_info_rtt(sock) or connect_time)
+        with self.lock:
+            self.applied = applied
+            self.connections += 1
+
+    def report(self):
+        with self.lock:
+            applied = dict(self.applied)
+            rtt = self.rtt
+            connections = self.connections
+        requested = applied.get("rcvbuf_requested")
+        congestion = applied.get("congestion") or "system default"
+        if self.requested_congestion and self.requested_congestion != self.congestion:
+            congestion += f" ({self.requested_congestion} not allowed)"
+        return {
+            "rtt_ms": round(rtt * 1000, 1) if rtt else None,
+            "rcvbuf": "autotune" if not requested else requested,
+            "rcvbuf_effective": applied.get("rcvbuf"),
+            "keepalive": f"{KEEPALIVE_IDLE}s/{KEEPALIVE_INTERVAL}s x{KEEPALIVE_COUNT}" if applied.get("keepalive") else "off",
+            "nodelay": bool(applied.get("nodelay")),
+            "congestion": congestion,
+            "connections": connections
+        }
+
+    def summary(self):
+        r = self.report()
+        rcvbuf = "autotune" if r["rcvbuf"] == "autotune" else f"{r['rcvbuf'] / (1024 * 1024):.1f} MB (BDP)"
+        rtt = f"RTT {r['rtt_ms']} ms, " if r["rtt_ms"] else ""
+        return f"{rtt}rcvbuf {rcvbuf}, keepalive {r['keepalive']}, nodelay {'on' if r['nodelay'] else 'off'}, {r['congestion']}"
@@ -0,0 +1,235 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import os
+import sys
+import stat
+import time
+import threading
+from disk_writer import BufferPool
+from scheduler import stream_scheduler
+from backends import RangeError
+
+class StreamError(Exception):
+    pass
+
+class Sink:
+    def __init__(self, target):
+        self.target = target
+        self.file = None
+        self.owned = False
+        if callable(target):
+            self.write = target
+        elif target == "-":
+            self.file = sys.stdout.buffer
+            self.write = self.write_file
+        else:
+            self.file = open(target, "wb", buffering=0)
+            self.owned = True
+            self.write = self.write_file
+
+    def write_file(self, view):
+        while view:
+            n = self.file.write(view)
+            view = view[n:]
+
+    def is_pipe(self):
+        return self.file is not None and stat.S_ISFIFO(os.fstat(self.file.fileno()).st_mode)
+
+    def close(self):
+        if self.file is None:
+            return
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+class SegmentStream:
+    def __init__(self, open_range, total_size, write, workers=4, segment_size=4 * 1024 * 1024, window=None, progress=None, on_progress=None, cancelled=lambda: False, paused=lambda: False):
+        self.open_range = open_range
+        self.total_size = total_size
+        self.write = write
+        self.workers = max(1, workers)
+        self.segment_size = segment_size
+        self.window = window or self.workers * 2 + 2
+        self.progress = progress if progress is not None else [0] * self.workers
+        self.on_progress = on_progress or (lambda: None)
+        self.cancelled = cancelled
+        self.paused = paused
+        self.count = (total_size + segment_size - 1) // segment_size
+        self.scheduler = stream_scheduler(total_size, segment_size, self.window)
+        self.pool = BufferPool(segment_size, self.window + 1 + self.workers)
+        self.buffers = {}
+        self.users = {}
+        self.finished = set()
+        self.pieces = {}
+        self.head = 0
+        self.cursor = 0
+        self.error = None
+        self.cond = threading.Condition()
+
+    def stopped(self):
+        return self.error is not None or self.cancelled()
+
+    def run(self):
+        threads = [threading.Thread(target=self.worker, args=(i,), daemon=True) for i in range(min(self.workers, self.count))]
+        for t in threads:
+            t.start()
+        try:
+            self.drain()
+        finally:
+            with self.cond:
+                if self.error is None and self.cursor < self.total_size:
+                    self.error = StreamError("stream stopped")
+                self.cond.notify_all()
+            for t in threads:
+                t.join()
+        if self.error is not None and not self.cancelled():
+            raise self.error
+
+    def drain(self):
+        while self.cursor < self.total_size:
+            with self.cond:
+                piece = self.pieces.get(self.head)
+                while not self.stopped() and (piece is None or piece.pos <= self.cursor):
+                    self.cond.wait(0.5)
+                    piece = self.pieces.get(self.head)
+                if self.stopped():
+                    return
+                upto = piece.pos
+                index = self.cursor // self.segment_size
+                buf = self.buffers[index]
+            base = index * self.segment_size
+            try:
+                self.write(memoryview(buf)[self.cursor - base:upto - base])
+            except Exception as e:
+                self.fail(e)
+                return
+            released = None
+            with self.cond:
+                self.cursor = upto
+                if upto > piece.end:
+                    del self.pieces[self.head]
+                    self.head = upto
+                    if upto % self.segment_size == 0 or upto == self.total_size:
+                        self.finished.add(index)
+                        released = self.retire(index)
+                self.scheduler.release(upto)
+                self.cond.notify_all()
+            if released is not None:
+                self.pool.release(released)
+
+    def claim(self):
+        while not self.stopped():
+            seg = self.scheduler.claim()
+            if seg is not None:
+                break
+            if self.scheduler.exhausted():
+                return None, None
+            with self.cond:
+                self.cond.wait(0.5)
+        else:
+            return None, None
+        index = seg.start // self.segment_size
+        with self.cond:
+            buf = self.buffers.get(index)
+        if buf is None:
+            fresh = self.pool.acquire()
+            with self.cond:
+                buf = self.buffers.setdefault(index, fresh)
+            if buf is not fresh:
+                self.pool.release(fresh)
+        with self.cond:
+            self.pieces.setdefault(seg.start, seg)
+            self.users[index] = self.users.get(index, 0) + 1
+            self.cond.notify_all()
+        return seg, buf
+
+    def retire(self, index):
+        # a connection whose segment was taken over may still be reading into the buffer
+        if self.users.get(index) or index not in self.finished:
+            return None
+        self.finished.discard(index)
+        self.users.pop(index, None)
+        return self.buffers.pop(index)
+
+    def worker(self, idx):
+        while True:
+            seg, buf = self.claim()
+            if seg is None:
+                return
+            try:
+                self.fill(seg, buf, idx)
+                self.scheduler.done(seg)
+            except Exception as e:
+                if self.stopped() or isinstance(e, RangeError) or not self.scheduler.failed(seg):
+                    self.fail(e)
+                    return
+            finally:
+                with self.cond:
+                    self.users[seg.start // self.segment_size] -= 1
+                    released = self.retire(seg.start // self.segment_size)
+                if released is not None:
+                    self.pool.release(released)
+
+    def fill(self, seg, buf, idx):
+        base = seg.start - seg.start % self.segment_size
+        reader, close = self.open_range(seg.pos, seg.end)
+        try:
+            view = memoryview(buf)
+            while seg.pos <= seg.end:
+                if self.stopped():
+                    return
+                while self.paused() and not self.stopped():
+                    time.sleep(0.1)
+                offset = seg.pos - base
+                n = reader.readinto(view[offset:offset + min(seg.remaining(), self.scheduler.split_min)])
+                if not n:
+                    raise StreamError(f"connection closed at byte {seg.pos}")
+                n = self.scheduler.advance(seg, n)
+                if seg.start == self.head:
+                    with self.cond:
+                        self.cond.notify_all()
+                self.progress[idx] += n
+                self.on_progress()
+        finally:
+            close()
+
+    def fail(self, error):
+        with self.cond:
+            if self.error is None:
+                self.error = error
+            self.cond.notify_all()
+
+def stream_sequential(reader, write, progress, on_progress, cancelled=lambda: False, paused=lambda: False, buffer_size=65536):
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    while not cancelled():
+        while paused() and not cancelled():
+            time.sleep(0.1)
+        n = reader.readinto(view)
+        if not n:
+            return
+        write(view[:n])
+        progress[0] += n
+        on_progress()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from benchmark import start_server, PayloadHandler
+
+class NoRangeHandler(PayloadHandler):
+    def send_payload(self, body):
+        del self.headers["Range"]
+        super().send_payload(body)
+
+@pytest.fixture
+def payload():
+    return os.urandom(3 * 1024 * 1024 + 17)
+
+@pytest.fixture
+def server(payload):
+    server = start_server(payload)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def read_range(backend, url, start, end):
+    reader, close = backend.open_range(url, start, end)
+    data = bytearray()
+    buf = bytearray(65536)
+    view = memoryview(buf)
+    try:
+        while True:
+            n = reader.readinto(view)
+            if not n:
+                break
+            data += view[:n]
+    finally:
+        close()
+    return bytes(data)
@@ -0,0 +1,39 @@
+import pytest
+from conftest import read_range
+from benchmark import start_server, PayloadHandler
+from backends import HttpBackend
+
+class CountingHandler(PayloadHandler):
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+@pytest.fixture
+def counting_server(payload):
+    server = start_server(payload, CountingHandler)
+    server.connections = 0
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize("zero_copy", [True, False])
+def test_range_requests_reuse_connection(counting_server, payload, zero_copy):
+    backend = HttpBackend(zero_copy=zero_copy)
+    url = f"http://127.0.0.1:{counting_server.server_port}/file.bin"
+    backend.probe(url)
+    step = 256 * 1024
+    for start in range(0, len(payload), step):
+        assert read_range(backend, url, start, min(start + step, len(payload)) - 1) == payload[start:start + step]
+    assert counting_server.connections == 1
+    backend.close()
+
+def test_partial_read_drops_connection(counting_server, payload):
+    backend = HttpBackend()
+    url = f"http://127.0.0.1:{counting_server.server_port}/file.bin"
+    for _ in range(2):
+        reader, close = backend.open_range(url, 0, None)
+        reader.readinto(memoryview(bytearray(1024)))
+        close()
+    assert read_range(backend, url, 0, 9) == payload[:10]
+    assert counting_server.connections == 3
+    backend.close()
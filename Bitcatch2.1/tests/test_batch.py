@@ -0,0 +1,63 @@
+import os
+import pytest
+from benchmark import start_server, PayloadHandler
+from batch import local_path, parse_listing
+
+def test_list_urls_keep_host_and_path():
+    a = local_path("https://data.test/a/data.csv", "out")
+    b = local_path("https://data.test/b/data.csv", "out")
+    c = local_path("https://other.test:8080/a/data.csv", "out")
+    assert len({a, b, c}) == 3
+    assert a == os.path.join("out", "data.test", "a", "data.csv")
+    assert c == os.path.join("out", "other.test_8080", "a", "data.csv")
+
+def test_list_urls_with_queries_do_not_collide():
+    a = local_path("https://data.test/get.php?id=1", "out")
+    b = local_path("https://data.test/get.php?id=2", "out")
+    assert a != b and a.endswith(".php")
+    assert local_path("https://data.test/", "out") == os.path.join("out", "data.test", "index.html")
+
+def test_paths_stay_inside_output_folder():
+    path = local_path("https://data.test/../../etc/passwd", "out")
+    assert path == os.path.join("out", "data.test", "etc", "passwd")
+    assert local_path("https://data.test/root/x/%2e%2e/y", "out", "https://data.test/root/") == os.path.join("out", "x", "y")
+
+def test_parse_listing_reads_dates_and_sizes():
+    html = """<pre><a href="../">../</a>
+<a href="sub/">sub/</a>      01-Mar-2024 10:00    -
+<a href="a.iso">a.iso</a>    01-Mar-2024 10:00:05  734003200
+<a href="b.txt">b.txt</a>
+</pre>"""
+    dirs, files = parse_listing("http://h.test/pub/", html)
+    assert dirs == ["http://h.test/pub/sub/"]
+    assert files == {"http://h.test/pub/a.iso": "01-Mar-2024 10:00:05|734003200", "http://h.test/pub/b.txt": None}
+
+class PartlyBrokenHandler(PayloadHandler):
+    def send_payload(self, body):
+        if not self.path.startswith("/bad"):
+            super().send_payload(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.server.payload)))
+        self.end_headers()
+        if body:
+            self.wfile.write(self.server.payload[:1000])
+        self.close_connection = True
+
+def test_batch_keeps_only_complete_files(tmp_path, payload):
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    from batch import BatchThread
+    server = start_server(payload, PartlyBrokenHandler)
+    base = f"http://127.0.0.1:{server.server_port}"
+    (tmp_path / "urls.txt").write_text(f"{base}/a/good.bin\n{base}/bad.bin\n{base}/b/good.bin\n")
+    out = tmp_path / "out"
+    thread = BatchThread(str(tmp_path / "urls.txt"), str(out))
+    thread.run()
+    server.shutdown()
+    server.server_close()
+    host = f"127.0.0.1_{server.server_port}"
+    assert thread.failed == 1
+    assert (out / host / "a" / "good.bin").read_bytes() == payload
+    assert (out / host / "b" / "good.bin").read_bytes() == payload
+    assert sorted(p.name for p in (out / host).iterdir()) == ["a", "b"]
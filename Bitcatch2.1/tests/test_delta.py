@@ -0,0 +1,62 @@
+import os
+import pytest
+import delta
+from benchmark import start_server, PayloadHandler
+
+def control_for(tmp_path, data, blocksize=4096):
+    path = tmp_path / "new.bin"
+    path.write_bytes(data)
+    return delta.parse_control(delta.make_control(str(path), blocksize=blocksize))
+
+def test_scan_finds_shifted_blocks(tmp_path):
+    old = os.urandom(256 * 1024)
+    new = old[:100000] + os.urandom(333) + old[100000:]
+    (tmp_path / "old.bin").write_bytes(old)
+    control = control_for(tmp_path, new)
+    reports = []
+    found = delta.scan(control, str(tmp_path / "old.bin"), progress=lambda pos, size: reports.append(pos))
+    assert reports[-1] == len(old)
+    for i, pos in found.items():
+        assert new[i * 4096:(i + 1) * 4096] == old[pos:pos + 4096] or i == control.count() - 1
+    assert sum(e - s + 1 for s, e in delta.missing_ranges(control, found)) <= 3 * 4096
+
+def test_scan_gives_up_on_unrelated_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(delta, "MISS_LIMIT", 1024 * 1024)
+    (tmp_path / "old.bin").write_bytes(os.urandom(4 * 1024 * 1024))
+    control = control_for(tmp_path, os.urandom(64 * 1024))
+    reports = []
+    found = delta.scan(control, str(tmp_path / "old.bin"), progress=lambda pos, size: reports.append(pos))
+    assert found == {}
+    assert reports[-2] <= 2 * 1024 * 1024
+
+class RecordingHandler(PayloadHandler):
+    def do_GET(self):
+        self.server.requested.append(self.headers.get("Range"))
+        super().do_GET()
+
+def test_download_delta_fetches_only_missing_ranges(tmp_path, payload):
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    from download_thread import DownloadThread
+    old = payload[:500000] + os.urandom(777) + payload[500000:2000000] + payload[2100000:]
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "file.bin").write_bytes(old)
+    (tmp_path / "new.bin").write_bytes(payload)
+    (tmp_path / "file.bcdelta").write_bytes(delta.make_control(str(tmp_path / "new.bin"), blocksize=4096))
+    control = delta.parse_control((tmp_path / "file.bcdelta").read_bytes())
+    expected = delta.missing_ranges(control, delta.scan(control, str(out / "file.bin")))
+    server = start_server(payload, RecordingHandler)
+    server.requested = []
+    errors = []
+    thread = DownloadThread(f"http://127.0.0.1:{server.server_port}/file.bin", str(out), 4, delta_control=str(tmp_path / "file.bcdelta"))
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    QtCore.QCoreApplication.processEvents()
+    server.shutdown()
+    server.server_close()
+    assert errors == []
+    assert (out / "file.bin").read_bytes() == payload
+    assert delta.verify(control, str(out / "file.bin"))
+    assert sorted(server.requested) == sorted(f"bytes={s}-{e}" for s, e in expected)
+    assert 100000 <= sum(e - s + 1 for s, e in expected) < len(payload) // 8
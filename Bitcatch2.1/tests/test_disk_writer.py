@@ -0,0 +1,59 @@
+import os
+import sys
+import ctypes
+import pytest
+from disk_writer import DiskWriter, FADVISE_LAG
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="mincore/posix_fadvise")
+
+def resident(path):
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.mmap.restype = ctypes.c_void_p
+    libc.mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long)
+    libc.munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+    libc.mincore.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p)
+    size = os.path.getsize(path)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        addr = libc.mmap(None, size, 1, 1, fd, 0)
+    finally:
+        os.close(fd)
+    pages = (size + 4095) // 4096
+    vec = ctypes.create_string_buffer(pages)
+    libc.mincore(addr, size, vec)
+    libc.munmap(addr, size)
+    return sum(b & 1 for b in vec.raw) * 4096
+
+def test_data_survives_writer(tmp_path):
+    path = str(tmp_path / "out.bin")
+    writer = DiskWriter(budget=4 * 1024 * 1024)
+    fd = writer.open(path)
+    chunks = [os.urandom(100000) for _ in range(100)]
+    for i, chunk in enumerate(chunks):
+        writer.write(fd, i * 100000, chunk)
+    writer.close(fd)
+    writer.shutdown()
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(chunks)
+
+def test_drop_cache_keeps_page_cache_small(tmp_path):
+    probe = tmp_path / "probe.bin"
+    probe.write_bytes(os.urandom(4 * 1024 * 1024))
+    fd = os.open(probe, os.O_RDONLY)
+    os.fsync(fd)
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    os.close(fd)
+    if resident(str(probe)):
+        pytest.skip("filesystem keeps pages resident (tmpfs)")
+    path = str(tmp_path / "out.bin")
+    writer = DiskWriter(drop_cache=True)
+    fd = writer.open(path)
+    chunk = os.urandom(1024 * 1024)
+    for i in range(96):
+        writer.write(fd, i * len(chunk), chunk)
+    with writer.cond:
+        while writer.pending:
+            writer.cond.wait()
+    assert resident(path) <= FADVISE_LAG + 2 * writer.align
+    writer.close(fd)
+    writer.shutdown()
@@ -0,0 +1,75 @@
+import os
+import pytest
+from conftest import NoRangeHandler
+from benchmark import start_server, PayloadHandler
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from download_thread import DownloadThread
+
+class TruncatingHandler(PayloadHandler):
+    def send_payload(self, body):
+        if body and self.headers.get("Range", "bytes=0-").startswith("bytes=0-"):
+            super().send_payload(body)
+            return
+        self.send_response(206)
+        self.send_header("Content-Length", "1000000")
+        self.end_headers()
+        if body:
+            self.wfile.write(bytes(1000))
+        self.close_connection = True
+
+def download(handler, payload, folder, parts=4):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    server = start_server(payload, handler)
+    errors = []
+    thread = DownloadThread(f"http://127.0.0.1:{server.server_port}/f.bin", str(folder), parts)
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    app.processEvents()
+    server.shutdown()
+    server.server_close()
+    return thread, errors
+
+@pytest.mark.parametrize("handler", [PayloadHandler, NoRangeHandler])
+def test_multi_part_download(tmp_path, payload, handler):
+    thread, errors = download(handler, payload, tmp_path)
+    assert errors == []
+    assert (tmp_path / "f.bin").read_bytes() == payload
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["f.bin"]
+
+def test_failed_part_leaves_no_output(tmp_path, payload):
+    thread, errors = download(TruncatingHandler, payload, tmp_path)
+    assert errors
+    assert list(tmp_path.iterdir()) == []
+
+def test_profile_records_origin_downloads_only(tmp_path):
+    from host_profiles import HostProfiles
+    from delta import make_control
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    payload = os.urandom(5 * 1024 * 1024)
+    server = start_server(payload)
+    url = f"http://127.0.0.1:{server.server_port}/f.bin"
+    profiles = HostProfiles(str(tmp_path / "profiles.json"))
+    DownloadThread(url, str(tmp_path), 4, profiles=profiles).run()
+    host = f"127.0.0.1:{server.server_port}"
+    assert profiles.get(host)["n"] == 1
+    (tmp_path / "f.bin.zsync").write_bytes(make_control(str(tmp_path / "f.bin"), url))
+    thread = DownloadThread(url, str(tmp_path), 4, delta_control=str(tmp_path / "f.bin.zsync"), profiles=profiles)
+    thread.run()
+    app.processEvents()
+    server.shutdown()
+    server.server_close()
+    assert thread.progress[4] == len(payload)
+    assert profiles.get(host)["n"] == 1
+
+@pytest.mark.parametrize("drop_cache, threshold, expected", [(None, 1 << 30, False), (None, 1024, True), (True, 1 << 30, True), (False, 1024, False)])
+def test_drop_cache_by_size_or_option(tmp_path, payload, monkeypatch, drop_cache, threshold, expected):
+    import download_thread
+    monkeypatch.setattr(download_thread, "DROP_CACHE_SIZE", threshold)
+    server = start_server(payload)
+    thread = DownloadThread(f"http://127.0.0.1:{server.server_port}/f.bin", str(tmp_path), 2, drop_cache=drop_cache)
+    thread.run()
+    server.shutdown()
+    server.server_close()
+    assert (tmp_path / "f.bin").read_bytes() == payload
+    assert thread.drop_cache is expected
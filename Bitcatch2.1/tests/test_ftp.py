@@ -0,0 +1,75 @@
+import time
+import logging
+import threading
+import pytest
+from conftest import read_range
+from backends import FtpBackend, backend_for
+
+pytest.importorskip("pyftpdlib")
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.handlers import FTPHandler
+from pyftpdlib.servers import ThreadedFTPServer
+
+class CountingHandler(FTPHandler):
+    def on_connect(self):
+        self.server.opened += 1
+
+    def on_disconnect(self):
+        self.server.closed += 1
+
+@pytest.fixture
+def ftp_server(tmp_path, payload):
+    logging.getLogger("pyftpdlib").setLevel(logging.WARNING)
+    (tmp_path / "file.bin").write_bytes(payload)
+    authorizer = DummyAuthorizer()
+    authorizer.add_anonymous(str(tmp_path))
+    handler = type("Handler", (CountingHandler,), {"authorizer": authorizer})
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    server.opened = server.closed = 0
+    thread = threading.Thread(target=server.serve_forever, kwargs={"timeout": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.close_all()
+    thread.join()
+
+def wait_for(check):
+    deadline = time.time() + 5
+    while not check() and time.time() < deadline:
+        time.sleep(0.02)
+    return check()
+
+def test_probe_and_ranges_reuse_control_connection(ftp_server, payload):
+    backend = backend_for(f"ftp://127.0.0.1:{ftp_server.address[1]}/file.bin")
+    url = f"ftp://127.0.0.1:{ftp_server.address[1]}/file.bin"
+    assert backend.probe(url) == (len(payload), True)
+    step = 1024 * 1024
+    for start in range(0, len(payload), step):
+        assert read_range(backend, url, start, min(start + step, len(payload)) - 1) == payload[start:start + step]
+    assert read_range(backend, url, 100, None) == payload[100:]
+    assert ftp_server.opened == 1
+    backend.close()
+    assert wait_for(lambda: ftp_server.closed == 1)
+
+def test_idle_connections_are_reaped(ftp_server, payload, monkeypatch):
+    backend = FtpBackend()
+    url = f"ftp://127.0.0.1:{ftp_server.address[1]}/file.bin"
+    backend.probe(url)
+    monkeypatch.setattr(FtpBackend, "idle_timeout", 0)
+    backend.release(backend.key(url), backend.connect(backend.key(url)))
+    assert wait_for(lambda: ftp_server.closed == 1)
+    assert sum(len(pool) for pool in backend.idle.values()) == 1
+    backend.close()
+
+def test_download_thread_closes_ftp_connections(ftp_server, payload, tmp_path):
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    from download_thread import DownloadThread
+    out = tmp_path / "out"
+    out.mkdir()
+    errors = []
+    thread = DownloadThread(f"ftp://127.0.0.1:{ftp_server.address[1]}/file.bin", str(out), 4)
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    assert errors == []
+    assert (out / "file.bin").read_bytes() == payload
+    assert wait_for(lambda: ftp_server.closed == ftp_server.opened)
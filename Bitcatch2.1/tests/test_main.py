@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import pytest
+
+pytest.importorskip("PySide6.QtWidgets")
+import benchmark
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_HISTORY = '''
+import sys
+sys.path.insert(0, sys.argv[1])
+from PySide6.QtWidgets import QApplication
+import main
+app = QApplication(sys.argv[:1])
+window, tray = main.create_window(app)
+entry = {"url": "https://example.com/a.iso", "output_folder": "/tmp", "time": "2025-01-01 00:00:00", "mode": "Single Download", "performance": "Normal", "parts": 1}
+assert window.history_page is None and not window.history_loaded
+main.history_loaded(window, [entry] * 3)
+assert window.history_page is None
+window.show_history()
+print(window.history_table.rowCount())
+'''
+
+def run_qt(script, cwd):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    return subprocess.run([sys.executable, "-c", script, HERE], cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+
+def test_history_page_built_on_first_visit(tmp_path):
+    out = run_qt(LAZY_HISTORY, tmp_path)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.split()[-1] == "3"
+
+def test_startup_benchmark_reports_first_paint(capsys):
+    benchmark.bench_startup(200, 1, 0)
+    assert "first paint:" in capsys.readouterr().out
@@ -0,0 +1,52 @@
+import functools
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import pytest
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from mirror import MirrorThread
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "site"
+    (root / "sub").mkdir(parents=True)
+    (root / "x%41").write_bytes(b"percent")
+    (root / "xA").write_bytes(b"plain")
+    (root / "sub" / "a b.txt").write_bytes(b"space")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(root)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield root, f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+def sync(url, folder, delete=False):
+    QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    thread = MirrorThread(url, str(folder), delete=delete)
+    thread.run()
+    return thread
+
+def test_delete_removes_only_stale_files(site, tmp_path):
+    root, url = site
+    out = tmp_path / "out"
+    assert sync(url, out).failed == 0
+    assert (out / "x%41").read_bytes() == b"percent"
+    assert (out / "xA").read_bytes() == b"plain"
+    assert (out / "sub" / "a b.txt").read_bytes() == b"space"
+    (root / "x%41").unlink()
+    thread = sync(url, out, delete=True)
+    assert thread.deleted == 1
+    assert not (out / "x%41").exists()
+    assert (out / "xA").read_bytes() == b"plain"
+
+def test_unchanged_files_are_not_downloaded_again(site, tmp_path):
+    root, url = site
+    out = tmp_path / "out"
+    sync(url, out)
+    thread = sync(url, out)
+    assert len(thread.not_modified) == 3
+    assert thread.failed == 0
@@ -0,0 +1,110 @@
+import os
+import base64
+import hashlib
+import pytest
+import requests
+from benchmark import start_server, PayloadHandler
+from backends import origin_digest
+from peer_cache import PeerCache, PeerService, find_peers
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from download_thread import DownloadThread
+
+TOKEN = "s3cret"
+
+class Origin(PayloadHandler):
+    def send_payload(self, body):
+        if body:
+            first, _, last = self.headers.get("Range", "bytes=0-")[6:].partition("-")
+            self.server.served += (int(last) if last else len(self.server.payload) - 1) - int(first) + 1
+        super().send_payload(body)
+
+    def end_headers(self):
+        self.send_header("ETag", '"v1"')
+        if self.server.digest:
+            self.send_header("Repr-Digest", f"sha-256=:{base64.b64encode(hashlib.sha256(self.server.payload).digest()).decode()}:")
+        super().end_headers()
+
+@pytest.fixture
+def origin(payload):
+    server = start_server(payload, Origin)
+    server.served = 0
+    server.digest = True
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def peers(tmp_path, origin, payload):
+    url = f"http://127.0.0.1:{origin.server_port}/big.iso"
+    services = []
+    for i in range(2):
+        folder = tmp_path / f"peer{i}"
+        folder.mkdir()
+        (folder / "big.iso").write_bytes(payload)
+        cache = PeerCache(str(folder / "peers.json"))
+        cache.add(url, str(folder / "big.iso"), '"v1"')
+        service = PeerService(cache, TOKEN, port=0, host="127.0.0.1", discovery=False)
+        service.start()
+        services.append(service)
+    yield url, services
+    for service in services:
+        service.stop()
+
+def download(url, folder, peers, token=TOKEN):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    folder.mkdir()
+    errors = []
+    thread = DownloadThread(url, str(folder), 4, peers=",".join(f"127.0.0.1:{s.port}" for s in peers), peer_token=token)
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    app.processEvents()
+    return thread, errors
+
+def test_origin_digest_headers():
+    digest = hashlib.sha256(b"x").digest()
+    assert origin_digest({"repr-digest": f"sha-512=:{base64.b64encode(bytes(64)).decode()}:, sha-256=:{base64.b64encode(digest).decode()}:"}) == ("sha256", digest.hex())
+    assert origin_digest({"content-md5": base64.b64encode(hashlib.md5(b"x").digest()).decode()}) == ("md5", hashlib.md5(b"x").hexdigest())
+    assert origin_digest({"digest": "SHA-256=not base64!"}) is None
+    assert origin_digest({}) is None
+
+def test_download_from_peers(tmp_path, origin, payload, peers):
+    url, services = peers
+    addresses = [f"127.0.0.1:{s.port}" for s in services]
+    digest = ("sha256", hashlib.sha256(payload).hexdigest())
+    assert len(find_peers(addresses, url, len(payload), digest, '"v1"', token=TOKEN)) == 2
+    assert find_peers(addresses, url, len(payload), digest, '"v2"', token=TOKEN) == []
+    assert find_peers(addresses, url, len(payload), ("sha256", "0" * 64), '"v1"', token=TOKEN) == []
+    thread, errors = download(url, tmp_path / "out", services)
+    assert errors == []
+    assert (tmp_path / "out" / "big.iso").read_bytes() == payload
+    assert origin.served < len(payload)
+
+def test_lying_peers_fall_back_to_origin(tmp_path, origin, payload, peers):
+    url, services = peers
+    for service in services:
+        path = service.cache.entries[url]["path"]
+        st = os.stat(path)
+        with open(path, "wb") as f:
+            f.write(bytes(len(payload)))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    thread, errors = download(url, tmp_path / "out", services)
+    assert (tmp_path / "out" / "big.iso").read_bytes() == payload
+    assert thread.errors > 0
+
+def test_peers_unused_without_origin_digest(tmp_path, origin, payload, peers):
+    url, services = peers
+    origin.digest = False
+    thread, errors = download(url, tmp_path / "out", services)
+    assert (tmp_path / "out" / "big.iso").read_bytes() == payload
+    assert origin.served == len(payload)
+
+def test_peer_service_requires_token(tmp_path, peers):
+    url, services = peers
+    lookup = f"http://127.0.0.1:{services[0].port}/lookup"
+    assert requests.get(lookup, params={"url": url}, proxies={"http": None}).status_code == 401
+    assert requests.get(lookup, params={"url": url}, headers={"Authorization": "Bearer wrong"}, proxies={"http": None}).status_code == 401
+    assert requests.get(lookup, params={"url": url}, headers={"Authorization": "Bearer " + TOKEN}, proxies={"http": None}).status_code == 200
+    assert services[0].server.server_address[0] == "127.0.0.1"
+    with pytest.raises(ValueError):
+        PeerService(services[0].cache, "", port=0, host="127.0.0.1", discovery=False)
@@ -0,0 +1,29 @@
+import time
+import multiprocessing
+import pytest
+from process_engine import ProcessEngine
+
+def flood(errors):
+    for i in range(64):
+        errors.put(f"{i}:" + "x" * 65536)
+
+def test_wait_reads_errors_while_workers_exit():
+    engine = ProcessEngine("http://127.0.0.1:9/f.bin", "unused", 0, 2, 2, {"chunk_size": 65536})
+    ctx = multiprocessing.get_context("spawn")
+    engine.workers = [ctx.Process(target=flood, args=(engine.errors,), daemon=True) for _ in range(2)]
+    engine.start()
+    deadline = time.monotonic() + 30
+    while not engine.wait(0.25):
+        assert time.monotonic() < deadline, "workers blocked on a full error queue"
+    assert len(engine.messages()) == 128
+
+def test_multi_process_download(tmp_path, server, payload):
+    QtCore = pytest.importorskip("PySide6.QtCore")
+    QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    from download_thread import DownloadThread
+    errors = []
+    thread = DownloadThread(f"http://127.0.0.1:{server.server_port}/f.bin", str(tmp_path), 4, processes=2)
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    assert errors == []
+    assert (tmp_path / "f.bin").read_bytes() == payload
@@ -0,0 +1,43 @@
+import socket
+import time
+from conftest import read_range
+from backends import HttpBackend
+from resolver import Resolver, race
+
+DEAD = (socket.AF_INET, "127.0.0.9")
+LIVE = (socket.AF_INET, "127.0.0.1")
+
+def stub_resolver(addrs):
+    return Resolver(lookup=lambda host, port: list(addrs))
+
+def test_race_skips_dead_address(server):
+    sock = race([DEAD, LIVE], server.server_port, timeout=5)
+    try:
+        assert sock.getpeername()[0] == "127.0.0.1"
+    finally:
+        sock.close()
+
+def test_dead_first_address(server, payload):
+    resolver = stub_resolver([DEAD, LIVE])
+    backend = HttpBackend(resolver=resolver, connections=4)
+    url = f"http://mirror.test:{server.server_port}/file.bin"
+    started = time.monotonic()
+    assert backend.probe(url) == (len(payload), True)
+    assert time.monotonic() - started < 5
+    step = len(payload) // 4
+    parts = [read_range(backend, url, i * step, len(payload) - 1 if i == 3 else (i + 1) * step - 1) for i in range(4)]
+    assert b"".join(parts) == payload
+    pool = resolver.pool_for("mirror.test", server.server_port)
+    assert [r.key for r in pool.healthy_routes()] == [LIVE]
+    backend.close()
+
+def test_unresolvable_host_fails(server):
+    def lookup(host, port):
+        raise socket.gaierror("no such host")
+    backend = HttpBackend(resolver=Resolver(lookup=lookup))
+    try:
+        backend.probe(f"http://missing.test:{server.server_port}/")
+    except Exception as e:
+        assert "no such host" in str(e)
+    else:
+        raise AssertionError("probe succeeded")
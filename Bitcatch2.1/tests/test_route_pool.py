@@ -0,0 +1,82 @@
+import http.client
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from conftest import read_range
+from benchmark import start_server
+from backends import BackendError, HttpBackend, make_proxy_pool
+from route_pool import RoutePool
+
+class ForwardProxy(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.relay(False)
+
+    def do_GET(self):
+        self.relay(True)
+
+    def relay(self, body):
+        self.server.relayed += 1
+        target = urlsplit(self.path)
+        upstream = http.client.HTTPConnection(target.hostname, target.port, timeout=10)
+        headers = {"Range": self.headers["Range"]} if self.headers["Range"] else {}
+        upstream.request(self.command, target.path, headers=headers)
+        r = upstream.getresponse()
+        data = r.read()
+        self.send_response(r.status)
+        for key in ("Content-Length", "Content-Range", "Accept-Ranges"):
+            if r.getheader(key):
+                self.send_header(key, r.getheader(key))
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+        upstream.close()
+
+def proxy_server():
+    server = start_server(b"", ForwardProxy)
+    server.relayed = 0
+    return server
+
+def test_pool_prefers_faster_route():
+    pool = RoutePool(["slow", "fast"])
+    for key, rate in (("slow", 1.0), ("fast", 4.0)):
+        route = next(r for r in pool.routes if r.key == key)
+        route.active += 1
+        pool.release(route, int(rate * 1000), 1.0)
+    picked = [pool.acquire().key for _ in range(5)]
+    assert picked.count("fast") == 4
+
+def test_pool_takes_failing_route_down():
+    pool = RoutePool(["a", "b"], max_failures=2, retry_after=60.0)
+    a = pool.routes[0]
+    for _ in range(2):
+        a.active += 1
+        pool.release(a, ok=False)
+    assert not a.healthy()
+    assert {pool.acquire().key for _ in range(3)} == {"b"}
+
+def test_rejects_unknown_proxy_scheme():
+    with pytest.raises(BackendError):
+        make_proxy_pool(["ftp://127.0.0.1:21"])
+
+def test_segments_spread_over_proxies(server, payload):
+    proxies = [proxy_server(), proxy_server()]
+    backend = HttpBackend(proxy=[f"http://127.0.0.1:{p.server_port}" for p in proxies] + ["http://127.0.0.1:9"], connections=4)
+    url = f"http://127.0.0.1:{server.server_port}/file.bin"
+    assert backend.probe(url) == (len(payload), True)
+    assert [r.healthy() for r in backend.proxy_pool.routes] == [True, True, False]
+    step = len(payload) // 8
+    with ThreadPoolExecutor(4) as pool:
+        parts = pool.map(lambda i: read_range(backend, url, i * step, len(payload) - 1 if i == 7 else (i + 1) * step - 1), range(8))
+        data = b"".join(parts)
+    backend.close()
+    for p in proxies:
+        p.shutdown()
+        p.server_close()
+    assert data == payload
+    assert all(p.relayed > 1 for p in proxies)
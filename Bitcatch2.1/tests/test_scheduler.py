@@ -0,0 +1,98 @@
+import pytest
+from scheduler import SegmentScheduler, part_scheduler, stream_scheduler
+from simulation import simulate
+from streaming import SegmentStream
+
+class BytesReader:
+    def __init__(self, data, fail_after=None):
+        self.data = data
+        self.pos = 0
+        self.fail_after = fail_after
+
+    def readinto(self, view):
+        if self.fail_after is not None and self.pos >= self.fail_after:
+            raise ConnectionResetError("reset")
+        n = min(len(view), len(self.data) - self.pos, 4096)
+        view[:n] = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+def test_part_scheduler_covers_file_once():
+    scheduler = part_scheduler(1000, 3)
+    segments = []
+    while (seg := scheduler.claim()) is not None:
+        segments.append((seg.start, seg.end))
+        scheduler.advance(seg, seg.remaining())
+        scheduler.done(seg)
+    assert segments == [(0, 333), (334, 667), (668, 999)]
+    assert scheduler.complete()
+
+def test_failed_segment_resumes_where_it_stopped():
+    scheduler = SegmentScheduler(100, 50, retries=1)
+    seg = scheduler.claim()
+    scheduler.advance(seg, 20)
+    assert scheduler.failed(seg)
+    again = scheduler.claim()
+    assert again is seg and again.pos == 20
+    assert not scheduler.failed(again)
+    assert scheduler.broken and scheduler.claim() is None
+
+def test_window_limits_claims_until_released():
+    scheduler = stream_scheduler(100, 10, 2)
+    first, second = scheduler.claim(), scheduler.claim()
+    assert scheduler.claim() is None and not scheduler.exhausted()
+    scheduler.advance(first, 10)
+    scheduler.done(first)
+    scheduler.release(10)
+    assert scheduler.claim().start == 20
+
+@pytest.mark.parametrize("scenario", ["baseline", "slow-connection", "resets", "throttle", "shared-uplink"])
+@pytest.mark.parametrize("policy", ["segments", "stream"])
+def test_simulated_downloads_complete(scenario, policy):
+    result = simulate(scenario, policy)
+    assert result.completed
+    assert result.transferred == 8 * 1024 ** 3
+
+def test_segment_stream_retries_reset_connections():
+    data = bytes(range(256)) * 4096
+    attempts = []
+    def open_range(start, end):
+        attempts.append(start)
+        fail = 10000 if len(attempts) % 3 == 1 else None
+        return BytesReader(data[start:end + 1], fail), lambda: None
+    out = bytearray()
+    SegmentStream(open_range, len(data), out.extend, workers=3, segment_size=65536).run()
+    assert bytes(out) == data
+
+def test_segment_stream_gives_up():
+    def open_range(start, end):
+        return BytesReader(b"x" * (end - start + 1), 0), lambda: None
+    with pytest.raises(ConnectionResetError):
+        SegmentStream(open_range, 1000, lambda view: None, workers=2, segment_size=100).run()
+
+def test_lagging_head_segment_is_taken_over():
+    now = [0.0]
+    scheduler = SegmentScheduler(64, 16, split_min=4, clock=lambda: now[0])
+    segments = [scheduler.claim() for _ in range(4)]
+    now[0] = 2.0
+    scheduler.advance(segments[0], 1)
+    for seg in segments[1:]:
+        scheduler.advance(seg, 12)
+    tail = scheduler.claim()
+    assert (tail.start, tail.end) == (1, 15)
+    assert segments[0].remaining() == 0
+
+def test_idle_worker_splits_largest_remaining_work():
+    scheduler = SegmentScheduler(64, 64, split_min=4)
+    seg = scheduler.claim()
+    scheduler.advance(seg, 16)
+    tail = scheduler.claim()
+    assert (seg.end, tail.start, tail.end) == (39, 40, 63)
+    assert not scheduler.exhausted()
+
+def test_stream_with_slow_connection_keeps_pace():
+    assert simulate("slow-connection", "stream").elapsed < simulate("slow-connection", "segments").elapsed * 1.2
+
+def test_throttle_persists_across_requests_on_a_connection():
+    result = simulate("throttle", "segments")
+    assert result.elapsed > (8 * 1024 - 8 * 64) / (8 * 0.25) * 0.95
@@ -0,0 +1,36 @@
+import socket
+import socket_tuning
+from socket_tuning import SocketTuning, RCVBUF_MIN
+from backends import HttpBackend
+from conftest import read_range
+
+def test_rcvbuf_follows_bandwidth_delay_product(monkeypatch):
+    monkeypatch.setattr(socket_tuning, "rcvbuf_limits", lambda: (131072, 64 * 1024 * 1024, 6 * 1024 * 1024))
+    assert SocketTuning(rate=10 * 1024 * 1024, rtt=0.1).rcvbuf_size() == 2 * 1024 * 1024
+    assert SocketTuning(rate=10 * 1024 * 1024, rtt=0.001).rcvbuf_size() is None
+    assert SocketTuning(rate=1024 * 1024 * 1024, rtt=0.3).rcvbuf_size() == 64 * 1024 * 1024
+    assert SocketTuning(rtt=None).rcvbuf_size() is None
+    assert SocketTuning(rcvbuf=RCVBUF_MIN).rcvbuf_size() == RCVBUF_MIN
+
+def test_rcvbuf_left_to_autotuning_when_rmem_max_clamps(monkeypatch):
+    monkeypatch.setattr(socket_tuning, "rcvbuf_limits", lambda: (131072, 212992, 6 * 1024 * 1024))
+    assert SocketTuning(rate=10 * 1024 * 1024, rtt=0.1).rcvbuf_size() is None
+
+def test_merge_overrides_existing_options():
+    tuning = SocketTuning(rcvbuf=None, keepalive=False, congestion="no-such-algorithm")
+    merged = tuning.merge([(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0), (socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)])
+    assert merged == [(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1), (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+    assert "not allowed" in tuning.report()["congestion"]
+
+def test_tuned_connections_are_reported(server, payload):
+    tuning = SocketTuning(rcvbuf=RCVBUF_MIN, measure=True)
+    backend = HttpBackend(tuning=tuning)
+    url = f"http://127.0.0.1:{server.server_port}/f.bin"
+    backend.probe(url)
+    assert read_range(backend, url, 0, None) == payload
+    report = tuning.report()
+    assert report["connections"] >= 1
+    assert report["nodelay"] and report["keepalive"] != "off"
+    assert report["rcvbuf_effective"] >= RCVBUF_MIN
+    assert report["rtt_ms"] is not None
+    backend.close()
@@ -0,0 +1,31 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from conftest import read_range
+from backends import HttpBackend
+
+def test_probe_skips_failing_source(server, payload):
+    backend = HttpBackend(sources=["192.0.2.77", "127.0.0.5"])
+    url = f"http://127.0.0.1:{server.server_port}/file.bin"
+    assert backend.probe(url) == (len(payload), True)
+    routes = {str(r.key): r for r in backend.source_pool.routes}
+    assert not routes["192.0.2.77"].healthy()
+    assert read_range(backend, url, 0, 99999) == payload[:100000]
+    assert routes["127.0.0.5"].bytes == 100000
+    backend.close()
+
+def test_segments_spread_over_loopback_sources(server, payload):
+    backend = HttpBackend(sources=["127.0.0.2", "127.0.0.3"], connections=4)
+    url = f"http://127.0.0.1:{server.server_port}/file.bin"
+    backend.probe(url)
+    step = len(payload) // 8
+    with ThreadPoolExecutor(4) as pool:
+        parts = pool.map(lambda i: read_range(backend, url, i * step, len(payload) - 1 if i == 7 else (i + 1) * step - 1), range(8))
+        data = b"".join(parts)
+    assert data == payload
+    assert all(r.bytes for r in backend.source_pool.routes)
+    backend.close()
+
+def test_all_sources_failing():
+    backend = HttpBackend(sources=["192.0.2.77", "192.0.2.78"])
+    with pytest.raises(Exception):
+        backend.probe("http://127.0.0.1:9/")
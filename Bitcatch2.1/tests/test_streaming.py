@@ -0,0 +1,23 @@
+import hashlib
+import pytest
+from conftest import NoRangeHandler
+from benchmark import start_server, PayloadHandler
+
+QtCore = pytest.importorskip("PySide6.QtCore")
+from download_thread import DownloadThread
+
+@pytest.fixture(scope="module")
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+@pytest.mark.parametrize("handler", [PayloadHandler, NoRangeHandler])
+def test_stream_in_order(app, payload, handler):
+    server = start_server(payload, handler)
+    digest = hashlib.sha256()
+    errors = []
+    thread = DownloadThread(f"http://127.0.0.1:{server.server_port}/file.bin", None, 4, stream_to=digest.update)
+    thread.error_signal.connect(errors.append)
+    thread.run()
+    server.shutdown()
+    assert errors == []
+    assert digest.digest() == hashlib.sha256(payload).digest()
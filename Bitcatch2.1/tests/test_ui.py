@@ -0,0 +1,25 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("PySide6.QtWidgets")
+from throughput import ThroughputRecorder
+from ui import ThroughputGraph
+
+def points(line):
+    return [(line.at(i).x(), line.at(i).y()) for i in range(line.size())]
+
+def test_graph_rebuild_matches_appended_points():
+    counters = [0, 0]
+    appended, rebuilt = [SimpleNamespace(capacity=8, lines=[], samples=0, recorder=ThroughputRecorder(lambda: counters, 8)) for _ in range(2)]
+    for graph in (appended, rebuilt):
+        graph.recorder.sample(0.0)
+    for t in range(1, 12):
+        counters[0] += t * 1024 * 1024
+        counters[1] += 2 * 1024 * 1024
+        for graph in (appended, rebuilt):
+            graph.recorder.sample(float(t))
+        ThroughputGraph.extend(appended)
+        rebuilt.lines = []
+        ThroughputGraph.extend(rebuilt)
+        assert [points(line) for line in appended.lines] == [points(line) for line in rebuilt.lines]
+    assert points(rebuilt.lines[0])[-1] == (rebuilt.samples, 13.0)
@@ -0,0 +1,86 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+from array import array
+
+MB = 1024 * 1024
+
+class RingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array("d", bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self):
+        start = (self.head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            return self.data[start:start + self.count]
+        return self.data[start:] + self.data[:self.head]
+
+    def last(self):
+        return self.data[(self.head - 1) % self.capacity] if self.count else 0.0
+
+    def peak(self):
+        return max(self.values(), default=0.0)
+
+class ThroughputRecorder:
+    def __init__(self, source, capacity=120):
+        self.source = source
+        self.capacity = capacity
+        self.overall = RingBuffer(capacity)
+        self.segments = []
+        self.previous = None
+        self.sampled_at = 0.0
+
+    def sample(self, now=None):
+        now = time.monotonic() if now is None else now
+        counters = array("q", self.source())
+        if self.previous is None or len(counters) != len(self.previous):
+            self.segments = [RingBuffer(self.capacity) for _ in counters]
+            self.previous = counters
+            self.sampled_at = now
+            return False
+        elapsed = now - self.sampled_at
+        if elapsed <= 0:
+            return False
+        total = 0.0
+        for ring, new, old in zip(self.segments, counters, self.previous):
+            rate = max(new - old, 0) / elapsed / MB
+            ring.append(rate)
+            total += rate
+        self.overall.append(total)
+        self.previous = counters
+        self.sampled_at = now
+        return True
+
+    def slowest(self):
+        active = [(ring.last(), i) for i, ring in enumerate(self.segments) if ring.peak() > 0]
+        return min(active) if len(active) > 1 else None
@@ -0,0 +1,112 @@
+"""
+MIT License
+
+Copyright (c) 2024-2025 toxi360
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is furnished
+to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR
+PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE
+FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+
+import time
+import socket
+import ipaddress
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError, ConnectTimeoutError
+from resolver import race
+
+class TransportError(Exception):
+    pass
+
+def source_options(source):
+    try:
+        ipaddress.ip_address(source)
+        return (source, 0), []
+    except ValueError:
+        pass
+    if not hasattr(socket, "SO_BINDTODEVICE"):
+        raise TransportError(f"binding to interface {source} needs SO_BINDTODEVICE (Linux)")
+    return None, [(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, source.encode())]
+
+class TunedConnection:
+    resolver = None
+    pinned = None
+    tuning = None
+
+    def _new_conn(self):
+        if self.tuning:
+            self.socket_options = self.tuning.merge(self.socket_options)
+        started = time.monotonic()
+        sock = self.open_socket() if self.resolver else super()._new_conn()
+        if self.tuning:
+            self.tuning.inspect(sock, time.monotonic() - started)
+        return sock
+
+    def open_socket(self):
+        host = self._dns_host.lower()
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else None
+        pinned = self.pinned[1] if self.pinned and host == self.pinned[0] else None
+        try:
+            addrs = self.resolver.resolve(host, self.port)
+            if pinned:
+                addrs = [pinned] + [a for a in addrs if a != pinned]
+            sock = race(addrs, self.port, timeout, self.source_address, self.socket_options)
+        except socket.timeout as e:
+            raise ConnectTimeoutError(self, f"Connection to {self.host} timed out. (connect timeout={timeout})") from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        if pinned and sock.getpeername()[0] != pinned[1]:
+            self.resolver.mark_failed(host, self.port, pinned)
+        return sock
+
+def tuned_pool_classes(resolver=None, pinned=None, tuning=None):
+    attrs = {"resolver": resolver, "pinned": pinned, "tuning": tuning}
+    http = type("TunedHTTPConnection", (TunedConnection, HTTPConnection), attrs)
+    https = type("TunedHTTPSConnection", (TunedConnection, HTTPSConnection), attrs)
+    return {
+        "http": type("TunedHTTPConnectionPool", (HTTPConnectionPool,), {"ConnectionCls": http}),
+        "https": type("TunedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": https})
+    }
+
+class TransportAdapter(HTTPAdapter):
+    def __init__(self, source=None, resolver=None, pinned=None, tuning=None, **kwargs):
+        self.source = source
+        self.source_address, self.socket_options = source_options(source) if source else (None, [])
+        self.resolver = resolver
+        self.pinned = pinned
+        self.tuning = tuning
+        super().__init__(**kwargs)
+
+    def connection_kwargs(self, kwargs):
+        if self.source_address:
+            kwargs["source_address"] = self.source_address
+        if self.socket_options:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + self.socket_options
+        return kwargs
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **self.connection_kwargs(pool_kwargs))
+        if self.resolver or self.tuning:
+            self.poolmanager.pool_classes_by_scheme = tuned_pool_classes(self.resolver, self.pinned, self.tuning)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        fresh = proxy not in self.proxy_manager
+        manager = super().proxy_manager_for(proxy, **self.connection_kwargs(proxy_kwargs))
+        if fresh and self.tuning and not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = tuned_pool_classes(tuning=self.tuning)
+        return manager
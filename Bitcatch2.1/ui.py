@@ -21,7 +21,139 @@ ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEAL
 """
 
 from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QLabel, QLineEdit, QProgressBar, QFrame, QTableWidget, QTableWidgetItem, QComboBox, QFileDialog, QStackedWidget, QFormLayout, QCheckBox
-from PySide6.QtCore import Qt, QPoint
+from PySide6.QtCore import Qt, QPoint, QPointF, QTimer
+from PySide6.QtGui import QPainter, QPen, QColor, QPolygonF, QTransform
+from socket_tuning import congestion_algorithms
+
+THEMES = {
+    "Dark Default": """
+    QMainWindow, QWidget {background-color: #2b2b2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
+    QLineEdit, QComboBox, QTableWidget {background-color: #3c3f41; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
+    QPushButton {background-color: #3c3f41; color: #ffffff; padding: 10px; border: 1px solid #555; border-radius: 25px;}
+    QPushButton:hover {background-color: #505050;}
+    QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
+    QProgressBar::chunk {background-color: #795548; border-radius: 25px;}
+    #SidebarFrame {background-color: #3c3f41; border-radius: 30px;}
+    #HeaderFrame {background-color: #393c3f; border-radius: 30px;}
+    #SidebarTitle {font-weight: bold; font-size: 22px; color: #ffffff;}
+    """,
+    "Dark Purple": """
+    QMainWindow, QWidget {background-color: #2b2b3b; color: #ffffff; font-size: 14px; border-radius: 30px;}
+    QLineEdit, QComboBox, QTableWidget {background-color: #3c3f60; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
+    QPushButton {background-color: #6c5ce7; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
+    QPushButton:hover {background-color: #8e7fff;}
+    QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
+    QProgressBar::chunk {background-color: #6c5ce7; border-radius: 25px;}
+    #SidebarFrame {background-color: #36354b; border-radius: 30px;}
+    #HeaderFrame {background-color: #3c3f60; border-radius: 30px;}
+    #SidebarTitle {font-weight: bold; font-size: 22px; color: #ffffff;}
+    """,
+    "Dark Red": """
+    QMainWindow, QWidget {background-color: #2b2b2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
+    QLineEdit, QComboBox, QTableWidget {background-color: #3c3f41; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
+    QPushButton {background-color: #e74c3c; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
+    QPushButton:hover {background-color: #ff6b5f;}
+    QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
+    QProgressBar::chunk {background-color: #e74c3c; border-radius: 25px;}
+    #SidebarFrame {background-color: #3c3f41; border-radius: 30px;}
+    #HeaderFrame {background-color: #393c3f; border-radius: 30px;}
+    #SidebarTitle {font-weight: bold; font-size: 22px; color: #e74c3c;}
+    """,
+    "Dark Green": """
+    QMainWindow, QWidget {background-color: #1c1f1c; color: #ffffff; font-size: 14px; border-radius: 30px;}
+    QLineEdit, QComboBox, QTableWidget {background-color: #2d352d; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
+    QPushButton {background-color: #27ae60; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
+    QPushButton:hover {background-color: #2ecc71;}
+    QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
+    QProgressBar::chunk {background-color: #27ae60; border-radius: 25px;}
+    #SidebarFrame {background-color: #243224; border-radius: 30px;}
+    #HeaderFrame {background-color: #2d352d; border-radius: 30px;}
+    #SidebarTitle {font-weight: bold; font-size: 22px; color: #27ae60;}
+    """,
+    "Dark Blue": """
+    QMainWindow, QWidget {background-color: #1c1c2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
+    QLineEdit, QComboBox, QTableWidget {background-color: #2b2b3b; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
+    QPushButton {background-color: #0984e3; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
+    QPushButton:hover {background-color: #74b9ff;}
+    QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
+    QProgressBar::chunk {background-color: #0984e3; border-radius: 25px;}
+    #SidebarFrame {background-color: #2b2b3b; border-radius: 30px;}
+    #HeaderFrame {background-color: #2f2f4a; border-radius: 30px;}
+    #SidebarTitle {font-weight: bold; font-size: 22px; color: #0984e3;}
+    """,
+}
+
+class ThroughputGraph(QWidget):
+    def __init__(self, interval=500, capacity=120):
+        super().__init__()
+        self.setMinimumHeight(140)
+        self.capacity = capacity
+        self.recorder = None
+        self.lines = []
+        self.samples = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.tick)
+
+    def track(self, source):
+        from throughput import ThroughputRecorder
+        self.recorder = ThroughputRecorder(source, self.capacity)
+        self.recorder.sample()
+        self.lines = []
+        self.timer.start()
+        self.update()
+
+    def stop(self):
+        if self.recorder is not None:
+            self.tick()
+        self.timer.stop()
+
+    def tick(self):
+        if self.recorder.sample():
+            self.extend()
+            self.update()
+
+    def extend(self):
+        rings = [self.recorder.overall] + self.recorder.segments
+        self.samples += 1
+        if len(self.lines) != len(rings):
+            self.lines = [QPolygonF([QPointF(self.samples - ring.count + 1 + i, v) for i, v in enumerate(ring.values())]) for ring in rings]
+            return
+        for line, ring in zip(self.lines, rings):
+            line.append(QPointF(self.samples, ring.last()))
+            if line.size() > self.capacity:
+                line.remove(0)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect().adjusted(8, 24, -8, -8)
+        painter.setPen(QPen(self.palette().mid().color(), 1))
+        painter.drawRect(rect)
+        recorder = self.recorder
+        if recorder is None or recorder.overall.count < 2:
+            painter.drawText(rect, Qt.AlignCenter, "Throughput graph appears when a download starts")
+            return
+        text = f"Overall {recorder.overall.last():.2f} MB/s, peak {recorder.overall.peak():.2f} MB/s"
+        slowest = recorder.slowest()
+        if slowest:
+            text += f", slowest part #{slowest[1] + 1}: {slowest[0]:.2f} MB/s"
+        painter.setPen(self.palette().text().color())
+        painter.drawText(self.rect().adjusted(8, 2, -8, 0), Qt.AlignLeft | Qt.AlignTop, text)
+        peak = max(recorder.overall.peak(), 0.01) * 1.1
+        step = rect.width() / (self.capacity - 1)
+        painter.setClipRect(rect)
+        painter.setTransform(QTransform(step, 0, 0, -rect.height() / peak, rect.right() - self.samples * step, rect.bottom()))
+        count = len(self.lines) - 1
+        alpha = 90 if count > 8 else 180
+        for i, line in enumerate(self.lines[1:] if count > 1 else ()):
+            pen = QPen(QColor.fromHsv(i * 360 // count, 160, 230, alpha), 0)
+            painter.setPen(pen)
+            painter.drawPolyline(line)
+        pen = QPen(self.palette().highlight().color(), 2)
+        pen.setCosmetic(True)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(pen)
+        painter.drawPolyline(self.lines[0])
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -32,6 +164,12 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 80, 1200, 700)
         self.download_history = []
         self.download_thread = None
+        self.proxy_pool = None
+        self.source_pool = None
+        self.host_profiles = None
+        self.profiles_page = None
+        self.shared_files = None
+        self.peer_service = None
         central = QWidget()
         self.setCentralWidget(central)
         self.main_layout = QHBoxLayout(central)
@@ -47,9 +185,10 @@ class MainWindow(QMainWindow):
         self.right_layout.addWidget(self.stacked_widget, stretch=1)
         self.main_layout.addWidget(self.right_content)
         self.downloader_page = self.create_downloader_page()
-        self.history_page = self.create_history_page()
+        self.history_page = None
+        self.history_table = None
         self.stacked_widget.addWidget(self.downloader_page)
-        self.stacked_widget.addWidget(self.history_page)
+        self.current_theme = None
         self.apply_theme("Dark Default")
         self.oldPos = self.pos()
 
@@ -64,15 +203,19 @@ class MainWindow(QMainWindow):
         title.setAlignment(Qt.AlignCenter)
         btn_downloader = QPushButton("Downloader")
         btn_downloader.setObjectName("SidebarButton")
-        btn_downloader.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
+        btn_downloader.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.downloader_page))
         btn_history = QPushButton("History")
         btn_history.setObjectName("SidebarButton")
-        btn_history.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(1))
+        btn_history.clicked.connect(self.show_history)
+        btn_profiles = QPushButton("Host Profiles")
+        btn_profiles.setObjectName("SidebarButton")
+        btn_profiles.clicked.connect(self.show_profiles)
         layout.addSpacing(30)
         layout.addWidget(title)
         layout.addSpacing(30)
         layout.addWidget(btn_downloader)
         layout.addWidget(btn_history)
+        layout.addWidget(btn_profiles)
         layout.addStretch()
         return frame
 
@@ -108,22 +251,50 @@ class MainWindow(QMainWindow):
         folder_layout = QHBoxLayout()
         folder_layout.addWidget(self.folder_input)
         folder_layout.addWidget(self.browse_button)
+        self.url_input.setPlaceholderText("File URL, or a URL list file / directory index URL in Batch / Mirror mode")
         form.addRow("Download URL:", self.url_input)
         form.addRow("Output Folder:", folder_layout)
+        self.proxy_input = QLineEdit()
+        self.proxy_input.setPlaceholderText("Optional, comma separated: http://host:3128, https://host:443, socks5://host:1080")
+        form.addRow("Proxies:", self.proxy_input)
+        self.source_input = QLineEdit()
+        self.source_input.setPlaceholderText("Optional, comma separated local IPs or interfaces: 192.168.1.20, eth1")
+        form.addRow("Source Addresses:", self.source_input)
+        self.peers_input = QLineEdit()
+        self.peers_input.setPlaceholderText("Optional, comma separated BitCatch peers: 192.168.1.30:8765, or auto for local discovery")
+        form.addRow("LAN Peers:", self.peers_input)
+        self.peer_token_input = QLineEdit()
+        self.peer_token_input.setEchoMode(QLineEdit.Password)
+        self.peer_token_input.setPlaceholderText("Shared secret every peer must present, needed to share or use peers")
+        form.addRow("Peer Token:", self.peer_token_input)
+        self.share_host_input = QLineEdit()
+        self.share_host_input.setPlaceholderText("Optional LAN address to share on, default: the address of the default route")
+        form.addRow("Share On:", self.share_host_input)
+        self.congestion_combo = QComboBox()
+        self.congestion_combo.addItems(["System Default"] + congestion_algorithms())
+        form.addRow("TCP Congestion:", self.congestion_combo)
         layout.addLayout(form)
         mode_layout = QHBoxLayout()
         self.mode_combo = QComboBox()
-        self.mode_combo.addItems(["Single Thread", "Multi-part Download"])
+        self.mode_combo.addItems(["Single Thread", "Multi-part Download", "Batch Download", "Mirror Sync", "Delta Update"])
         self.performance_combo = QComboBox()
-        self.performance_combo.addItems(["Normal", "HPD (High Performance)"])
+        self.performance_combo.addItems(["Normal", "HPD (High Performance)", "HPD Multi-process"])
         mode_layout.addWidget(QLabel("Mode:"))
         mode_layout.addWidget(self.mode_combo)
         mode_layout.addSpacing(30)
         mode_layout.addWidget(QLabel("Performance:"))
         mode_layout.addWidget(self.performance_combo)
         layout.addLayout(mode_layout)
+        check_layout = QHBoxLayout()
         self.iso_checkbox = QCheckBox("ISO Mode")
-        layout.addWidget(self.iso_checkbox)
+        self.share_checkbox = QCheckBox("Share Downloads with LAN Peers")
+        self.cache_checkbox = QCheckBox("Keep Out of Page Cache")
+        self.cache_checkbox.setToolTip("Always drop written data from the page cache (files over 1 GB always are)")
+        check_layout.addWidget(self.iso_checkbox)
+        check_layout.addWidget(self.cache_checkbox)
+        check_layout.addWidget(self.share_checkbox)
+        check_layout.addStretch()
+        layout.addLayout(check_layout)
         btn_layout = QHBoxLayout()
         self.download_btn = QPushButton("Download")
         self.pause_btn = QPushButton("Pause")
@@ -145,6 +316,10 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.parts_label)
         layout.addWidget(self.speed_label)
         layout.addWidget(self.time_label)
+        self.socket_label = QLabel("Socket: -")
+        layout.addWidget(self.socket_label)
+        self.throughput_graph = ThroughputGraph()
+        layout.addWidget(self.throughput_graph)
         return page
 
     def create_history_page(self):
@@ -159,78 +334,103 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.history_table)
         return page
 
+    def show_history(self):
+        if self.history_page is None:
+            self.history_page = self.create_history_page()
+            self.stacked_widget.addWidget(self.history_page)
+            self.append_history_rows(self.download_history)
+        self.stacked_widget.setCurrentWidget(self.history_page)
+
     def update_history_table(self, history):
-        self.history_table.setRowCount(len(history))
-        for i, entry in enumerate(history):
+        if self.history_table is None:
+            return
+        self.history_table.setRowCount(0)
+        self.append_history_rows(history)
+
+    def append_history_rows(self, entries):
+        if self.history_table is None:
+            return
+        first = self.history_table.rowCount()
+        self.history_table.setUpdatesEnabled(False)
+        self.history_table.setRowCount(first + len(entries))
+        for i, entry in enumerate(entries, first):
             self.history_table.setItem(i, 0, QTableWidgetItem(entry["url"]))
             self.history_table.setItem(i, 1, QTableWidgetItem(entry["output_folder"]))
             self.history_table.setItem(i, 2, QTableWidgetItem(entry["time"]))
             self.history_table.setItem(i, 3, QTableWidgetItem(entry["mode"]))
             self.history_table.setItem(i, 4, QTableWidgetItem(entry["performance"]))
             self.history_table.setItem(i, 5, QTableWidgetItem(str(entry["parts"])))
+        self.history_table.setUpdatesEnabled(True)
+
+    def profiles(self):
+        if self.host_profiles is None:
+            from host_profiles import HostProfiles
+            self.host_profiles = HostProfiles()
+        return self.host_profiles
+
+    def peer_cache(self):
+        if self.shared_files is None:
+            from peer_cache import PeerCache
+            self.shared_files = PeerCache()
+        return self.shared_files
+
+    def create_profiles_page(self):
+        page = QWidget()
+        layout = QVBoxLayout(page)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+        self.profiles_table = QTableWidget()
+        self.profiles_table.setColumnCount(8)
+        self.profiles_table.setHorizontalHeaderLabels(["Host", "Best Parts", "Chunk (KB)", "MB/s", "Ranges", "Error Rate", "Downloads", "Updated"])
+        self.profiles_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.profiles_table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.profiles_table)
+        btn_layout = QHBoxLayout()
+        reset_selected = QPushButton("Reset Selected")
+        reset_selected.clicked.connect(self.reset_selected_profiles)
+        reset_all = QPushButton("Reset All")
+        reset_all.clicked.connect(self.reset_all_profiles)
+        btn_layout.addStretch()
+        btn_layout.addWidget(reset_selected)
+        btn_layout.addWidget(reset_all)
+        layout.addLayout(btn_layout)
+        return page
+
+    def show_profiles(self):
+        if self.profiles_page is None:
+            self.profiles_page = self.create_profiles_page()
+            self.stacked_widget.addWidget(self.profiles_page)
+        self.update_profiles_table()
+        self.stacked_widget.setCurrentWidget(self.profiles_page)
+
+    def update_profiles_table(self):
+        rows = self.profiles().rows()
+        self.profiles_table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            self.profiles_table.setItem(i, 0, QTableWidgetItem(row["host"]))
+            self.profiles_table.setItem(i, 1, QTableWidgetItem(str(row["parts"])))
+            self.profiles_table.setItem(i, 2, QTableWidgetItem(str(row["chunk"])))
+            self.profiles_table.setItem(i, 3, QTableWidgetItem(f"{row['rate']:.2f}"))
+            self.profiles_table.setItem(i, 4, QTableWidgetItem("Yes" if row["ranges"] else "No"))
+            self.profiles_table.setItem(i, 5, QTableWidgetItem(f"{row['errors'] * 100:.0f}%"))
+            self.profiles_table.setItem(i, 6, QTableWidgetItem(str(row["downloads"])))
+            self.profiles_table.setItem(i, 7, QTableWidgetItem(row["updated"]))
+
+    def reset_selected_profiles(self):
+        hosts = {self.profiles_table.item(index.row(), 0).text() for index in self.profiles_table.selectionModel().selectedRows()}
+        for host in hosts:
+            self.profiles().reset(host)
+        self.update_profiles_table()
+
+    def reset_all_profiles(self):
+        self.profiles().reset()
+        self.update_profiles_table()
 
     def apply_theme(self, theme_name):
-        if theme_name == "Dark Purple":
-            s = """
-            QMainWindow, QWidget {background-color: #2b2b3b; color: #ffffff; font-size: 14px; border-radius: 30px;}
-            QLineEdit, QComboBox, QTableWidget {background-color: #3c3f60; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
-            QPushButton {background-color: #6c5ce7; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
-            QPushButton:hover {background-color: #8e7fff;}
-            QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
-            QProgressBar::chunk {background-color: #6c5ce7; border-radius: 25px;}
-            #SidebarFrame {background-color: #36354b; border-radius: 30px;}
-            #HeaderFrame {background-color: #3c3f60; border-radius: 30px;}
-            #SidebarTitle {font-weight: bold; font-size: 22px; color: #ffffff;}
-            """
-        elif theme_name == "Dark Red":
-            s = """
-            QMainWindow, QWidget {background-color: #2b2b2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
-            QLineEdit, QComboBox, QTableWidget {background-color: #3c3f41; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
-            QPushButton {background-color: #e74c3c; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
-            QPushButton:hover {background-color: #ff6b5f;}
-            QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
-            QProgressBar::chunk {background-color: #e74c3c; border-radius: 25px;}
-            #SidebarFrame {background-color: #3c3f41; border-radius: 30px;}
-            #HeaderFrame {background-color: #393c3f; border-radius: 30px;}
-            #SidebarTitle {font-weight: bold; font-size: 22px; color: #e74c3c;}
-            """
-        elif theme_name == "Dark Green":
-            s = """
-            QMainWindow, QWidget {background-color: #1c1f1c; color: #ffffff; font-size: 14px; border-radius: 30px;}
-            QLineEdit, QComboBox, QTableWidget {background-color: #2d352d; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
-            QPushButton {background-color: #27ae60; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
-            QPushButton:hover {background-color: #2ecc71;}
-            QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
-            QProgressBar::chunk {background-color: #27ae60; border-radius: 25px;}
-            #SidebarFrame {background-color: #243224; border-radius: 30px;}
-            #HeaderFrame {background-color: #2d352d; border-radius: 30px;}
-            #SidebarTitle {font-weight: bold; font-size: 22px; color: #27ae60;}
-            """
-        elif theme_name == "Dark Blue":
-            s = """
-            QMainWindow, QWidget {background-color: #1c1c2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
-            QLineEdit, QComboBox, QTableWidget {background-color: #2b2b3b; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
-            QPushButton {background-color: #0984e3; color: #ffffff; padding: 10px; border: none; border-radius: 25px;}
-            QPushButton:hover {background-color: #74b9ff;}
-            QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
-            QProgressBar::chunk {background-color: #0984e3; border-radius: 25px;}
-            #SidebarFrame {background-color: #2b2b3b; border-radius: 30px;}
-            #HeaderFrame {background-color: #2f2f4a; border-radius: 30px;}
-            #SidebarTitle {font-weight: bold; font-size: 22px; color: #0984e3;}
-            """
-        else:
-            s = """
-            QMainWindow, QWidget {background-color: #2b2b2b; color: #ffffff; font-size: 14px; border-radius: 30px;}
-            QLineEdit, QComboBox, QTableWidget {background-color: #3c3f41; color: #ffffff; border: 1px solid #555; border-radius: 25px;}
-            QPushButton {background-color: #3c3f41; color: #ffffff; padding: 10px; border: 1px solid #555; border-radius: 25px;}
-            QPushButton:hover {background-color: #505050;}
-            QProgressBar {border: 1px solid #555; text-align: center; border-radius: 25px;}
-            QProgressBar::chunk {background-color: #795548; border-radius: 25px;}
-            #SidebarFrame {background-color: #3c3f41; border-radius: 30px;}
-            #HeaderFrame {background-color: #393c3f; border-radius: 30px;}
-            #SidebarTitle {font-weight: bold; font-size: 22px; color: #ffffff;}
-            """
-        self.setStyleSheet(s)
+        if theme_name == self.current_theme:
+            return
+        self.current_theme = theme_name
+        self.setStyleSheet(THEMES.get(theme_name, THEMES["Dark Default"]))
 
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select Folder")